@@ -13,14 +13,14 @@ from builtins import range
 import os
 import re
 import random
+import warnings
 
-from collections import namedtuple
-from math import pi, radians, cos, sin, asin, sqrt, acos, modf
+from collections import namedtuple, OrderedDict
+from math import pi, radians, cos, sin, asin, sqrt, acos, ceil, floor
 from itertools import groupby   
 from sys import stderr
 
 import numpy as np
-from scipy.spatial.distance import pdist, cdist, squareform
 
 __author__ = "Jussi Rasku"
 __copyright__ = "Copyright 2022, Jussi Rasku"
@@ -53,32 +53,68 @@ def _haversine(pt1, pt2):
 def _degrees_and_minutes_to_radians(x):
     """ Adapted from Reneilt 1991 TSPLIB article / TSPFAQ """
     PI = 3.141592
-    mins, degs = modf(x)
+    mins, degs = np.modf(x) # also converts whole coordinate arrays
     return (degs+100/60.0*mins)*PI/180.0
 
 def _geo(pt1, pt2):
     """ Adapted from Reneilt 1991 TSPLIB article / TSPFAQ
     this togehter with the _degrees_and_minutes_to_radians conversion produces
-    the same results than the optimal solution on the original GEO TSP files."""
+    the same results than the optimal solution on the original GEO TSP files.
+    
+    Vectorised: pt1 and pt2 are (lat, lon) pairs or broadcastable arrays of
+    them (..., 2), see _broadcast_D."""
     RRR = 6378.388
 
-    latitude_i_rads, longitude_i_rads = pt1
-    latitude_j_rads, longitude_j_rads = pt2
+    pt1 = np.asarray(pt1, dtype=float)
+    pt2 = np.asarray(pt2, dtype=float)
+    latitude_i_rads, longitude_i_rads = pt1[...,0], pt1[...,1]
+    latitude_j_rads, longitude_j_rads = pt2[...,0], pt2[...,1]
+    
+    q1 = np.cos(longitude_i_rads - longitude_j_rads)
+    q2 = np.cos(latitude_i_rads - latitude_j_rads)
+    q3 = np.cos(latitude_i_rads + latitude_j_rads)
+    q = np.asarray(np.clip(0.5*((1.0+q1)*q2-(1.0-q1)*q3), -1.0, 1.0))
+    d = np.asarray(RRR*np.arccos(q)+1.0)
     
-    q1 = cos(longitude_i_rads - longitude_j_rads)
-    q2 = cos(latitude_i_rads - latitude_j_rads)
-    q3 = cos(latitude_i_rads + latitude_j_rads)
-    return int( RRR*acos(0.5*((1.0+q1)*q2-(1.0-q1)*q3))+1.0 )
+    # np.arccos may differ from the C library acos by one ulp, which only
+    #  matters when the distance is about to be truncated to an integer:
+    #  these few values are recomputed with math.acos to stay bit exact.
+    close = np.abs(d-np.rint(d))<1e-6
+    if np.any(close):
+        d[close] = [RRR*acos(v)+1.0 for v in q[close].tolist()]
+    return np.trunc(d)
 
 def _att(pt1,pt2):
-    dx = pt1[0]-pt2[0]
-    dy = pt1[1]-pt2[1]
-    r = sqrt(dx**2+dy**2)/10.0
-    t = int(r)
-    return t+1 if t<r else t
+    """ Pseudo-Euclidean ATT distance of TSPLIB (Reinelt, 1991), rounded
+    up. Vectorised like _geo."""
+    pt1 = np.asarray(pt1, dtype=float)
+    pt2 = np.asarray(pt2, dtype=float)
+    dx = pt1[...,0]-pt2[...,0]
+    dy = pt1[...,1]-pt2[...,1]
+    r = np.sqrt((dx*dx+dy*dy)/10.0)
+    t = np.trunc(r+0.5)
+    return np.where(t<r, t+1.0, t)
 
-def calculate_D(pts, opts=None, tsplib_distances_type='EUC_2D'):
+def _broadcast_D(metric, pts, opts=None, block_size=2**20):
+    """ Distance matrix of a vectorised metric (_geo, _att) computed block of
+    rows by block of rows, so that the temporary arrays stay around
+    block_size elements """
+    P = np.asarray(pts, dtype=float)
+    Q = P if opts is None else np.asarray(opts, dtype=float)
+    D = np.empty((len(P), len(Q)))
+    rows = max(1, block_size//max(len(Q), 1))
+    for start in range(0, len(P), rows):
+        D[start:start+rows] = metric(P[start:start+rows, None, :], Q[None, :, :])
+    if opts is None:
+        np.fill_diagonal(D, 0.0)
+    return D
+
+def _tsplib_metric(tsplib_distances_type, tsplib_rounding=False):
+    """ Returns (pdtype, metric, postprocess) for the TSPLIB distance type:
+    the scipy metric name, or a vectorised metric function (_att, _geo),
+    and the rounding applied to the resulting distances """
     pdtype = 'euclidean'
+    metric = None
     # La fonction de post-traitement ne modifie pas les valeurs
     postprocess = lambda M: M  # Ne fait rien, retourne les valeurs telles quelles
     
@@ -87,28 +123,257 @@ def calculate_D(pts, opts=None, tsplib_distances_type='EUC_2D'):
     elif tsplib_distances_type=='MAN_2D':
         pdtype = 'cityblock'
     elif tsplib_distances_type=='CEIL_2D':
-        # Aucun traitement spécifique, gardez les valeurs telles quelles
-        pass
+        postprocess = np.ceil  # Distance euclidienne arrondie à l'entier supérieur
     elif tsplib_distances_type=='FLOOR_2D':
-        # Aucun traitement spécifique, gardez les valeurs telles quelles
-        pass
+        postprocess = np.floor  # Distance euclidienne arrondie à l'entier inférieur
     elif tsplib_distances_type=='EUC_2D':
-        # Aucun traitement spécifique, gardez les valeurs telles quelles
-        pass
+        if tsplib_rounding:
+            # nint() de TSPLIB : (int)(d+0.5)
+            postprocess = lambda M: np.floor(M+0.5)
     elif tsplib_distances_type=='ATT':
-        pdtype = lambda v,w : _att(v, w)  # Fonction personnalisée pour le calcul de la distance ATT
+        metric = _att  # Fonction vectorisée pour le calcul de la distance ATT
     elif tsplib_distances_type=='GEO':
-        pdtype = lambda v,w : _geo(v, w)  # Fonction personnalisée pour le calcul de la distance GEO
+        metric = _geo  # Fonction vectorisée pour le calcul de la distance GEO
     elif tsplib_distances_type=='EXACT_2D':
         # Aucun traitement spécifique, gardez les valeurs telles quelles
         pass
     else:
         raise ValueError("Unknown distance method")
+    return pdtype, metric, postprocess
+
+def _integer_metric(tsplib_distances_type, tsplib_rounding=False):
+    """ True if the TSPLIB distance type only gives integer distances """
+    return tsplib_distances_type in ('CEIL_2D', 'FLOOR_2D', 'ATT', 'GEO') or \
+        (tsplib_distances_type=='EUC_2D' and tsplib_rounding)
+
+def _to_storage_dtype(D, dtype):
+    """ Converts the distances D (any ndarray) to the storage dtype.
+    None keeps them as they are (float64). 'compact' picks uint16, or int32,
+    when all the distances are integers that fit, and keeps float64
+    otherwise. An integer dtype requires integer distances (for EUC_2D, see
+    tsplib_rounding), so that tour costs stay exact. """
+    if dtype is None:
+        return D
+    if D.size==0:
+        return D.astype(np.float64 if dtype=='compact' else dtype)
+    integers = np.array_equal(D, np.rint(D))
+    if dtype=='compact':
+        if not integers:
+            return D
+        dtype = np.uint16 if D.min()>=0 and D.max()<=np.iinfo(np.uint16).max else np.int32
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'iu':
+        if not integers:
+            raise ValueError("%s storage requires integer distances "%dtype.name+
+                             "(use tsplib_rounding=True for EUC_2D)")
+        if D.min()<np.iinfo(dtype).min or D.max()>np.iinfo(dtype).max:
+            raise ValueError("The distances do not fit in %s"%dtype.name)
+    return D.astype(dtype, copy=False)
+
+def calculate_D(pts, opts=None, tsplib_distances_type='EUC_2D', tsplib_rounding=False,
+                dtype=None):
+    """ Distance matrix between the points pts (or between pts and opts).
+    Integer TSPLIB metrics (CEIL_2D, FLOOR_2D, ATT, GEO) give the TSPLIB
+    reference values. EUC_2D distances are kept as floats, unless
+    tsplib_rounding is set: they are then rounded to the nearest integer as
+    in TSPLIB, so that the costs match the published optima.
+    
+    dtype sets the storage type of the matrix: None (float64), np.float32,
+    np.int32, np.uint16 or 'compact' (see _to_storage_dtype)."""
+    pdtype, metric, postprocess = _tsplib_metric(tsplib_distances_type, tsplib_rounding)
     
+    if metric is not None:
+        # Calcul par blocs de lignes, sans appel Python par paire de points
+        return _to_storage_dtype(postprocess(_broadcast_D(metric, pts, opts)), dtype)
+    
+    # scipy is only loaded when a matrix is actually computed
+    from scipy.spatial.distance import pdist, cdist, squareform
     if opts is None:
-        return postprocess(squareform(pdist(pts, pdtype)))  # Utilise scipy.spatial.distance.pdist pour calculer les distances
+        D = postprocess(squareform(pdist(pts, pdtype)))  # Utilise scipy.spatial.distance.pdist pour calculer les distances
     else:
-        return postprocess(cdist(pts, opts, pdtype))  # Utilise scipy.spatial.distance.cdist pour calculer les distances entre les ensembles de points
+        D = postprocess(cdist(pts, opts, pdtype))  # Utilise scipy.spatial.distance.cdist pour calculer les distances entre les ensembles de points
+    return _to_storage_dtype(D, dtype)
+
+# Above this size read_TSPLIB_CVRP returns a DistanceOracle rather than the
+#  dense float64 matrix (128 MB, about 4000 nodes)
+DENSE_MATRIX_MAX_BYTES = 128*2**20
+
+class DistanceOracle(object):
+    """ Distance matrix of a coordinate based instance, computed on demand.
+    
+    It is indexed like the dense matrix of calculate_D, with the same
+    values: D[i,j], D[i], D[i,:], D[I,J] with (broadcast) index arrays,
+    D[a:b,c:d]... len(D) and D.shape work as well, and np.asarray(D) builds
+    the dense matrix when it is really wanted. Nothing is precomputed: a
+    single distance costs a few float operations, rows are computed with
+    NumPy and the last `cache_rows` of them are kept in an LRU cache.
+    Distances are returned as `dtype` (e.g. np.float32, or np.int32 for the
+    integer TSPLIB metrics) to halve the memory of rows and blocks. With
+    dtype='compact', the integer metrics use uint16 when the bounding box of
+    the points guarantees that every distance fits, int32 otherwise.
+    """
+    
+    def __init__(self, pts, tsplib_distances_type='EUC_2D', tsplib_rounding=False,
+                 dtype=np.float64, cache_rows=256):
+        self.pdtype, self.metric, self.postprocess = _tsplib_metric(
+            tsplib_distances_type, tsplib_rounding)
+        self.tsplib_distances_type = tsplib_distances_type
+        self.tsplib_rounding = tsplib_rounding
+        self.points = np.array(pts, dtype=float)
+        self.dtype = self._storage_dtype(dtype)
+        self.shape = (len(self.points), len(self.points))
+        self.ndim = 2
+        self.cache_rows = cache_rows
+        self._rows = OrderedDict()
+        self._xy = self.points.tolist()
+        self._pair = self._scalar_metric()
+        self._cast = None if self.dtype==np.float64 else self.dtype.type
+    
+    def _storage_dtype(self, dtype):
+        """ Checks (or picks, for 'compact') the dtype of the distances """
+        integers = _integer_metric(self.tsplib_distances_type, self.tsplib_rounding)
+        if dtype is None or (dtype=='compact' and not integers):
+            return np.dtype(np.float64)
+        if dtype!='compact' and np.dtype(dtype).kind not in 'iu':
+            return np.dtype(dtype)
+        if not integers:
+            raise ValueError("%s storage requires integer distances "%np.dtype(dtype).name+
+                             "(use tsplib_rounding=True for EUC_2D)")
+        # largest possible distance, from the bounding box of the points
+        if self.tsplib_distances_type=='GEO':
+            bound = 6378.388*pi+1.0
+        elif len(self.points):
+            dx, dy = np.ptp(self.points, axis=0)
+            bound = sqrt(dx*dx+dy*dy)+1.0
+            if self.tsplib_distances_type=='ATT':
+                bound = bound/sqrt(10.0)+1.0
+        else:
+            bound = 0.0
+        if dtype=='compact':
+            dtype = np.uint16 if bound<=np.iinfo(np.uint16).max else np.int32
+        if bound>np.iinfo(dtype).max:
+            raise ValueError("The distances may not fit in %s"%np.dtype(dtype).name)
+        return np.dtype(dtype)
+    
+    def _scalar_metric(self):
+        """ Plain Python version of the metric for single distances, with the
+        same float operations (and thus values) as the vectorised one """
+        t = self.tsplib_distances_type
+        if t=='GEO':
+            return lambda p, q: float(_geo(p, q))
+        if t=='ATT':
+            def att(p, q):
+                dx = p[0]-q[0]
+                dy = p[1]-q[1]
+                r = sqrt((dx*dx+dy*dy)/10.0)
+                nint = int(r+0.5)
+                return float(nint+1 if nint<r else nint)
+            return att
+        if t=='MAX_2D':
+            return lambda p, q: max(abs(p[0]-q[0]), abs(p[1]-q[1]))
+        if t=='MAN_2D':
+            return lambda p, q: abs(p[0]-q[0])+abs(p[1]-q[1])
+        if t=='CEIL_2D':
+            rounding = ceil
+        elif t=='FLOOR_2D':
+            rounding = floor
+        elif t=='EUC_2D' and self.tsplib_rounding:
+            rounding = lambda d: floor(d+0.5)
+        else:
+            rounding = None
+        def euc(p, q):
+            dx = p[0]-q[0]
+            dy = p[1]-q[1]
+            d = sqrt(dx*dx+dy*dy)
+            return d if rounding is None else float(rounding(d))
+        return euc
+    
+    def distances(self, I, J):
+        """ Distances between the nodes I and J (index arrays, broadcast
+        together like NumPy fancy indexing does) """
+        I = np.asarray(I)
+        J = np.asarray(J)
+        P = self.points[I]
+        Q = self.points[J]
+        if self.metric is not None:
+            d = self.metric(P, Q)
+        else:
+            dx = P[...,0]-Q[...,0]
+            dy = P[...,1]-Q[...,1]
+            if self.pdtype=='chebyshev':
+                d = np.maximum(np.abs(dx), np.abs(dy))
+            elif self.pdtype=='cityblock':
+                d = np.abs(dx)+np.abs(dy)
+            else:
+                d = np.sqrt(dx*dx+dy*dy)
+        d = np.where(I==J, 0.0, self.postprocess(d))
+        return d.astype(self.dtype, copy=False)
+    
+    def row(self, i):
+        """ Distances from node i to all the nodes (read-only, cached) """
+        if i<0:
+            i += self.shape[0]
+        row = self._rows.get(i)
+        if row is not None:
+            self._rows.move_to_end(i)
+            return row
+        row = self.distances(i, np.arange(self.shape[0]))
+        row.flags.writeable = False
+        if self.cache_rows:
+            self._rows[i] = row
+            if len(self._rows)>self.cache_rows:
+                self._rows.popitem(last=False)
+        return row
+    
+    def astype(self, dtype):
+        """ Same oracle, giving the distances as dtype """
+        return DistanceOracle(self.points, self.tsplib_distances_type, self.tsplib_rounding,
+                              dtype, self.cache_rows)
+    
+    def take(self, indices):
+        """ Oracle of the nodes `indices` in that order, the lazy equivalent
+        of D[np.ix_(indices, indices)] (e.g. to move the depot first) """
+        return DistanceOracle(self.points[np.asarray(indices)], self.tsplib_distances_type,
+                              self.tsplib_rounding, self.dtype, self.cache_rows)
+    
+    def __len__(self):
+        return self.shape[0]
+    
+    def __getitem__(self, key):
+        if type(key) is tuple and len(key)==2:
+            i, j = key
+            if type(i) is int and type(j) is int or \
+               isinstance(i, (int, np.integer)) and isinstance(j, (int, np.integer)):
+                if i==j or i-j==self.shape[0] or j-i==self.shape[0]:
+                    d = 0.0
+                else:
+                    d = self._pair(self._xy[i], self._xy[j])
+                return d if self._cast is None else self._cast(d)
+        elif type(key) is tuple:
+            raise IndexError("too many indices for the distance matrix")
+        else:
+            i, j = key, slice(None)
+        
+        integer_i = isinstance(i, (int, np.integer))
+        if integer_i and isinstance(j, slice):
+            return self.row(int(i))[j]
+        
+        # Slices and integers select like NumPy basic indexing
+        nodes = np.arange(self.shape[0])
+        I = nodes[i] if integer_i or isinstance(i, slice) else np.asarray(i)
+        J = nodes[j] if isinstance(j, (int, np.integer, slice)) else np.asarray(j)
+        if (isinstance(i, slice) or isinstance(j, slice)) and I.ndim and J.ndim:
+            # a slice combined with an array or a slice: all the pairs
+            I = I.reshape(I.shape+(1,)*J.ndim)
+        return self.distances(I, J)
+    
+    def __array__(self, dtype=None, copy=None):
+        D = calculate_D(self.points, None, self.tsplib_distances_type, self.tsplib_rounding)
+        return D.astype(self.dtype if dtype is None else dtype, copy=False)
+    
+    def __repr__(self):
+        return "DistanceOracle(%d nodes, %s, %s)"%(self.shape[0],
+            self.tsplib_distances_type, self.dtype.name)
 
 def read_OPT_CVRP(file_name):    
     solution = [0]
@@ -125,10 +390,10 @@ def read_OPT_CVRP(file_name):
     count_k = 0
     with open(file_name, "r") as f:
         for l in f.readlines():
-            if file_ext == ".opt":
+            # CVRPLIB .sol files use the same "Route #k: ..." / "Cost c" lines
+            if file_ext in (".opt", ".sol"):
                 if "route" in l.lower():
-                    if not opt_k:
-                        count_k+1
+                    count_k+=1
                     _, routestring = l.split(":")
                     p_idxs = [int(s) for s in routestring.split()]
                     first_node = True
@@ -151,18 +416,81 @@ def read_OPT_CVRP(file_name):
     if len(solution)>1:
         solution.append(0)
         
-    if count_k or not opt_k:
+    if not opt_k:
         opt_k = count_k
-    elif opt_k!=count_k:
+    elif count_k and opt_k!=count_k:
         print("WARNING: the vehicle count in file name and solution differ", file=stderr)
 
     return solution, opt_f, opt_k
          
        
+# A section starts on its own line (no ':') with its keyword, and its data
+#  runs until the next section or EOF
+section_re = re.compile(r"^[ \t]*([A-Z_]+_SECTION|EOF)\b[^:\n]*$", re.M)
+field_re = re.compile(r"^([^:\n]*):([^\n]*)$", re.M)
+
+def _section_values(text):
+    """ All the whitespace separated numbers of a section as a flat float
+    array, parsed in a single NumPy call """
+    if not text or text.isspace():
+        return np.empty(0)
+    with warnings.catch_warnings():
+        # numpy only warns when it stops on a non numeric value
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(text, sep=' ')
+        except (DeprecationWarning, ValueError):
+            raise IOError("Non numeric value in a data section")
+
+def _section_rows(text, max_rows):
+    """ A section of node rows (id followed by its values) as a 2D array with
+    one row per node """
+    first_row = text.lstrip().split('\n', 1)[0].split()
+    values = _section_values(text)
+    width = max(len(first_row), 1)
+    if len(values)%width!=0 or len(values)//width>max_rows:
+        raise IOError("Section rows do not match the DIMENSION")
+    return values.reshape(-1, width)
+
+def _unpack_edge_weights(weights, size, edge_weight_format, dtype=None):
+    """ Builds the symmetric distance matrix from the EDGE_WEIGHT_SECTION
+    values. Boolean masks select the matrix cells in row-major order, which
+    is exactly the order the triangular formats list them in. The matrix is
+    allocated directly with the storage dtype of the values. """
+    weights = _to_storage_dtype(weights, dtype)
+    if edge_weight_format=="FULL_MATRIX":
+        if len(weights)!=size*size:
+            raise IOError("Explicit distance matrix did not have enough values")
+        # the later of the two symmetric values wins (the lower triangle)
+        M = weights.reshape(size, size)
+        D = np.tril(M)
+        D += np.tril(M, -1).T
+        return D
+    
+    if edge_weight_format=="LOWER_ROW":
+        mask = np.tri(size, k=-1, dtype=bool)
+    elif edge_weight_format=="LOWER_DIAG_ROW":
+        mask = np.tri(size, dtype=bool)
+    elif edge_weight_format in ("UPPER_ROW", "LOWER_COL"):
+        mask = ~np.tri(size, dtype=bool)
+    elif edge_weight_format=="UPPER_DIAG_ROW":
+        mask = ~np.tri(size, k=-1, dtype=bool)
+    else:
+        raise IOError("Unsupported EDGE_WEIGHT_FORMAT %s"%edge_weight_format)
+    if len(weights)!=np.count_nonzero(mask):
+        raise IOError("Explicit distance matrix did not have enough values")
+    
+    D = np.zeros((size, size), dtype=weights.dtype)
+    D[mask] = weights
+    diagonal = D.diagonal().copy()
+    D += D.T
+    np.fill_diagonal(D, diagonal)
+    return D
+
 ProblemDefinition = namedtuple('ProblemDefinition',
     ['size', 'coordinate_points', 'display_coordinate_points',
      'customer_demands', 'distance_matrix', 'capacity_constraint', 'edge_weight_type'])
-def read_TSPLIB_CVRP(file_name):
+def read_TSPLIB_CVRP(file_name, tsplib_rounding=False, dense=None, dtype=None):
     """ Returns a namedtuple (N, points, dd_points, demands, D, C, ewt) where
     * N is the size of the problem,
     * points has the coordinates of the depot (index 0) and customers,
@@ -170,10 +498,22 @@ def read_TSPLIB_CVRP(file_name):
     * dd_points has the DISPLAY coordinates,
         note: is usually None as files containing DISPLAY_DATA_SECTION are rare
     * demands is a list of demands with the depot demand (index 0) set to 0
-    * D is the distance matrix as a numpy 2D ndarray,
+    * D is the distance matrix as a numpy 2D ndarray (or a DistanceOracle),
     * C is the vehicle capacity constraint, can be None if it is not set
     * ewt is the EDGE_WEIGHT_TYPE
     
+    With tsplib_rounding, EUC_2D distances are rounded to integers as in
+    TSPLIB (see calculate_D).
+    
+    For coordinate based instances, D is the dense matrix as long as it takes
+    less than DENSE_MATRIX_MAX_BYTES, and a DistanceOracle computing the
+    distances on demand beyond that. dense=True/False forces either one.
+    
+    dtype is the storage type of D: None (float64), np.float32, np.int32,
+    np.uint16 or 'compact' for the smallest exact one (see calculate_D).
+    Integer types require integer distances: EXPLICIT matrices of integers,
+    the integer TSPLIB metrics, or EUC_2D with tsplib_rounding.
+    
     The reader supports following TSPLIB (Reinelt, 1991) fields:
         NAME
         TYPE
@@ -202,184 +542,96 @@ def read_TSPLIB_CVRP(file_name):
         journal on computing, 3(4):376-384
     """
     with open(file_name, "r") as fh:
-        # pylint: disable=unsubscriptable-object
-        
-        section = None
-        section_pos = 0
-        ij_section_pos = {'i':0,'j':0}
-        N=0
-        C=None
-        
-        points = None  
-        dd_points = None
-        demands = None
-        D = None
-        D_needs_update = False     
-        edge_weight_type = None
-        edge_weight_format = None
+        text = fh.read()
+    
+    N=0
+    C=None
+    
+    points = None  
+    dd_points = None
+    demands = None
+    D = None
+    D_needs_update = False     
+    edge_weight_type = None
+    edge_weight_format = None
+    
+    depot_ids = []
+    
+    # Section boundaries are located once, everything after EOF is ignored
+    sections = []
+    for match in section_re.finditer(text):
+        if match.group(1) == 'EOF':
+            text = text[:match.start()]
+            break
+        sections.append(match)
+    
+    # Parse fields
+    for match in field_re.finditer(text, 0, sections[0].start() if sections else len(text)):
+        field = match.group(1).strip()
+        value = match.group(2)
         
-        depot_ids = []
+        if 'TYPE' == field:
+            if not 'CVRP' in value and not 'TSP' in value:
+                raise IOError("Only CVRP TSPLIB files are supported")
+        elif 'DIMENSION' in field:
+            N = int(value)-1 # depot excluded
+        elif 'CAPACITY' in field:
+            C = int(value)
+        elif 'EDGE_WEIGHT_TYPE' in field:
+            edge_weight_type = value.strip()
+            if edge_weight_type not in ["MAX_2D", "MAN_2D", "EXACT_2D",
+                                        "CEIL_2D", "FLOOR_2D", "EUC_2D",
+                                        "EXPLICIT", "GEO", "ATT"]:
+                raise IOError("Only matrix and euclidian distance notation is supported")
+        elif 'EDGE_WEIGHT_FORMAT' in field:
+            edge_weight_format  = value.strip()
+    
+    # Section handling, each section is converted in bulk
+    for k, match in enumerate(sections):
+        section = match.group(1)
+        body = text[match.end():sections[k+1].start() if k+1<len(sections) else len(text)]
         
-        for l in fh.readlines():
-            line = l.strip()
-
-            if not line:
-                continue
-            
-            # Parse fields
-            if ':' in line:
-                field, value = line.split(":",1)
-                field = field.strip()
-                
-                if 'TYPE' == field:
-                    if not 'CVRP' in value and not 'TSP' in value:
-                        raise IOError("Only CVRP TSPLIB files are supported")
-                elif 'DIMENSION' in field:
-                    N = int(value)-1 # depot excluded
-                elif 'CAPACITY' in field:
-                    C = int(value)
-                elif 'EDGE_WEIGHT_TYPE' in field:
-                    edge_weight_type = value.strip()
-                    if edge_weight_type not in ["MAX_2D", "MAN_2D", "EXACT_2D",
-                                                "CEIL_2D", "FLOOR_2D", "EUC_2D",
-                                                "EXPLICIT", "GEO", "ATT"]:
-                        raise IOError("Only matrix and euclidian distance notation is supported")
-                elif 'EDGE_WEIGHT_FORMAT' in field:
-                    edge_weight_format  = value.strip()
+        if section == 'EDGE_WEIGHT_SECTION':
+            D = _unpack_edge_weights(_section_values(body), N+1, edge_weight_format, dtype)
+        elif section == 'NODE_COORD_SECTION':
+            xy = _section_rows(body, N+1)[:,1:3]
             
-            # Section handling
-            else:
-                if 'EOF' in line:
-                    break
+            # According to TSPLIB format spec. the GEO coordinates
+            #  are of  format degrees.minutes. Convert to radians
+            #  BUT FIX THE ISSUE WITH THE NEGATIVE MINUTES THE
+            #  ORIGINAL SPEC HAS!
+            if edge_weight_type=='GEO':
+                xy = _degrees_and_minutes_to_radians(xy)
             
-                if 'EDGE_WEIGHT_SECTION' in line:
-                    section = 'EDGE_WEIGHT_SECTION'
-                    D = np.zeros((N+1,N+1))
-                    ij_section_pos = {'i':0,'j':0}
-                    if (edge_weight_format=="LOWER_ROW"):
-                        ij_section_pos['j']=1
-                    elif (edge_weight_format=="UPPER_ROW" or
-                        edge_weight_format=="LOWER_COL"):
-                        ij_section_pos['i']=1
-                elif 'DEMAND_SECTION' in line:
-                    demands = [None]*(N+1)
-                    section = 'DEMAND_SECTION'
-                    section_pos = 0
-                elif 'DEPOT_SECTION' in line:
-                    section = 'DEPOT_SECTION'
-                    section_pos = 0
-                elif 'NODE_COORD_SECTION' in line:
-                    section = 'NODE_COORD_SECTION'
-                    points = [ [None, None] for i in range(N+1) ]
-                    if edge_weight_type!='EXPLICIT':
-                        # sometimes coordinates are incorrectly not given in 
-                        #  DISPLAY_DATA_SECTION even if a matrix is defined.
-                        D_needs_update = True
-                    section_pos = 0
-                elif 'DISPLAY_DATA_SECTION' in line:
-                    if points is None:
-                        section = 'DISPLAY_DATA_SECTION'
-                        dd_points = [ [None, None] for i in range(N+1) ]
-                        D_needs_update = False
-                        section_pos = 0
-                    else:
-                        section = ''
-                elif 'SVC_TIME_SECTION' in line:
-                    section = 'SVC_TIME_SECTION'
-                else:
-                    if section == 'EDGE_WEIGHT_SECTION':
-                        distances = line.split() 
-                        #print distances, section_pos, edge_weight_format
-                        for d in distances: 
-                            
-                            D[ij_section_pos['i']][ij_section_pos['j']] = float(d)
-                            D[ij_section_pos['j']][ij_section_pos['i']] = float(d)   
-                            
-                            if (edge_weight_format=="LOWER_ROW"):
-                                # incrementer
-                                ij_section_pos['i']+=1
-                                if ij_section_pos['i']==ij_section_pos['j']:
-                                    ij_section_pos['i'] = 0
-                                    ij_section_pos['j'] += 1                            
-                            elif (edge_weight_format=="UPPER_ROW" or 
-                                  edge_weight_format=="LOWER_COL"):
-                                # incrementer
-                                ij_section_pos['i']+=1
-                                if ij_section_pos['i']==len(D):
-                                    ij_section_pos['j'] += 1
-                                    ij_section_pos['i'] = ij_section_pos['j']+1                                    
-                            elif (edge_weight_format=="FULL_MATRIX"):
-                                # incrementer
-                                ij_section_pos['i']+=1
-                                if ij_section_pos['i']==len(D):
-                                    ij_section_pos['j'] += 1
-                                    ij_section_pos['i'] = 0
-                            elif (edge_weight_format=="LOWER_DIAG_ROW"):
-                                # incrementer
-                                ij_section_pos['i']+=1
-                                if ij_section_pos['i']==ij_section_pos['j']+1:
-                                    ij_section_pos['i'] = 0
-                                    ij_section_pos['j'] += 1
-                            elif (edge_weight_format=="UPPER_DIAG_ROW"):
-                                # incrementer
-                                ij_section_pos['i']+=1
-                                if ij_section_pos['i']==len(D):
-                                    ij_section_pos['j'] += 1
-                                    ij_section_pos['i'] = ij_section_pos['j']                            
-                            
-                            
-                    elif section == 'NODE_COORD_SECTION':
-                        coords = line.split()
-                        x = float( coords [1] )
-                        y = float( coords [2] )
-                        
-                        # According to TSPLIB format spec. the GEO coordinates
-                        #  are of  format degrees.minutes. Convert to radians
-                        #  BUT FIX THE ISSUE WITH THE NEGATIVE MINUTES THE
-                        #  ORIGINAL SPEC HAS!
-                        if edge_weight_type=='GEO':
-                            x = _degrees_and_minutes_to_radians(x)
-                            y = _degrees_and_minutes_to_radians(y)
-                            #print("lat, lon (in rads) : %.2f, %.2f"%(x,y))
-                        
-                        points[section_pos][0] = x
-                        points[section_pos][1] = y
-                        section_pos+=1
-                    elif  section == 'DISPLAY_DATA_SECTION':
-                        coords = line.split()
-                        x = float( coords [1] )
-                        y = float( coords [2] )
-                        dd_points[section_pos][0] = x
-                        dd_points[section_pos][1] = y
-                        section_pos+=1
-                    elif  section == 'DEMAND_SECTION':
-                        demand = line.split()
-                        c = float( demand[1] )
-                        demands[section_pos] = c # pylint: disable=unsupported-assignment-operation
-                        section_pos+=1
-                    elif  section == 'DEPOT_SECTION': 
-                        value = int(line)
-                        if value>0:
-                            depot_ids.append(value)
-                            if len(depot_ids)>1:
-                                raise IOError("multi depot problems not supported")
-                    
-        fh.close()
-        
-        if edge_weight_type=='EXPLICIT' and not (
-                ((edge_weight_format in ['FULL_MATRIX', 'LOWER_ROW', 'LOWER_DIAG_ROW']) and \
-                    ij_section_pos['i']==0 and ij_section_pos['j']==len(D)) or\
-                  (edge_weight_format in ['UPPER_ROW','LOWER_COL'] and \
-                    ij_section_pos['i']==len(D) and ij_section_pos['j']==len(D)-1) or\
-                  (edge_weight_format == 'UPPER_DIAG_ROW' and \
-                    ij_section_pos['i']==len(D) and ij_section_pos['j']==len(D))
-                ):
-            #print edge_weight_format, ij_section_pos 
-            raise IOError("Explicit distance matrix did not have enough values")
+            points = xy.tolist()+[ [None, None] for i in range(N+1-len(xy)) ]
+            if edge_weight_type!='EXPLICIT':
+                # sometimes coordinates are incorrectly not given in 
+                #  DISPLAY_DATA_SECTION even if a matrix is defined.
+                D_needs_update = True
+        elif section == 'DISPLAY_DATA_SECTION':
+            if points is None:
+                xy = _section_rows(body, N+1)[:,1:3]
+                dd_points = xy.tolist()+[ [None, None] for i in range(N+1-len(xy)) ]
+                D_needs_update = False
+        elif section == 'DEMAND_SECTION':
+            c = _section_rows(body, N+1)[:,1]
+            demands = c.tolist()+[None]*(N+1-len(c))
+        elif section == 'DEPOT_SECTION':
+            for value in body.split():
+                value = int(value)
+                if value>0:
+                    depot_ids.append(value)
+                    if len(depot_ids)>1:
+                        raise IOError("multi depot problems not supported")
     
-    D_needs_update = True
     if D_needs_update:
-        D = calculate_D(points, None, edge_weight_type )
+        if dense is None:
+            itemsize = np.dtype(float if dtype in (None, 'compact') else dtype).itemsize
+            dense = (N+1)**2*itemsize <= DENSE_MATRIX_MAX_BYTES
+        if dense:
+            D = calculate_D(points, None, edge_weight_type, tsplib_rounding, dtype)
+        else:
+            D = DistanceOracle(points, edge_weight_type, tsplib_rounding, dtype)
     
     #if edge_weight_type == "EXPLICIT":
         ## check if the matrix had integer dinstances (as they often have)
@@ -391,17 +643,18 @@ def read_TSPLIB_CVRP(file_name):
     if depot_ids and depot_ids[0]>1:
         # make sure depot is the 0
         idx_0 = depot_ids[0]-1
-        row_col_permutation = [idx_0]+list(range(0,idx_0))+list(range(idx_0+1,len(D)))
-        for i in range(N):
-            D[:,i] = D[row_col_permutation,i]
-        for i in range(N):
-            D[i,:] = D[i,row_col_permutation]
+        # one permutation of all the N+1 nodes, applied once
+        row_col_permutation = np.r_[idx_0, 0:idx_0, idx_0+1:N+1]
+        if isinstance(D, DistanceOracle):
+            D = D.take(row_col_permutation)
+        elif D is not None:
+            D = D[np.ix_(row_col_permutation, row_col_permutation)]
         if demands is not None and len(demands)>0:
-            demands = [demands[idx_0]]+demands[:idx_0]+demands[idx_0+1:]
+            demands = [demands[k] for k in row_col_permutation]
         if points is not None and len(points)>0:
-            points = [points[idx_0]]+points[:idx_0]+points[idx_0+1:]
+            points = [points[k] for k in row_col_permutation]
         if dd_points is not None and len(dd_points)>0:
-            dd_points = [dd_points[idx_0]]+dd_points[:idx_0]+dd_points[idx_0+1:]    
+            dd_points = [dd_points[k] for k in row_col_permutation]
         
     if edge_weight_type=="GEO":
         dd_points = points
@@ -517,50 +770,72 @@ def as_OPT_solution(cost, sol):
 
     return opt_str
 
+def _format_values(values):
+    """ The numbers of a row as strings, formatted like str(D[i,j]) """
+    if values.dtype==np.float64 or values.dtype.kind in 'iub':
+        return map(str, values.tolist())
+    # tolist() would widen float32 to float64 and change the shortest repr
+    return values.astype(str).tolist()
+
 def write_TSPLIB_file(tsplib_file_path, D,
                       d=None, C=None, L=None, selected_idxs=None,
-                      float_to_int_precision=None):
+                      float_to_int_precision=None, points=None,
+                      edge_weight_type='EUC_2D'):
+    """ Writes D (restricted to selected_idxs) as an UPPER_ROW EXPLICIT
+    TSPLIB file, a CVRP if the file name ends with .vrp. Each row of the
+    matrix is formatted with one join and written through a large buffer.
+    
+    If points is given, the NODE_COORD_SECTION of these coordinates is
+    written instead of the matrix (with edge_weight_type, D may be None):
+    O(N) lines instead of O(N^2) values. """
     
-    if not selected_idxs:
-        selected_idxs=list(range(len(D)))
+    size = len(points) if points is not None else len(D)
+    if selected_idxs is None or len(selected_idxs)==0:
+        selected_idxs=list(range(size))
+    selected_idxs = np.asarray(selected_idxs)
     write_cvrp = False
     if tsplib_file_path[-4:].lower()==".vrp":
         write_cvrp = True
         
-    with open(tsplib_file_path, 'w') as problem_file:
+    with open(tsplib_file_path, 'w', buffering=2**20) as problem_file:
         problem_file.write("NAME: temporary\n")
         if write_cvrp:
             problem_file.write("TYPE: CVRP\n")
             if C:
                 problem_file.write("CAPACITY: %d\n"%C)
             else:
-                problem_file.write("CAPACITY: %d\n"%len(D))
+                problem_file.write("CAPACITY: %d\n"%size)
             if L:
                 problem_file.write("DISTANCE: %d\n"%L)
         else:    
             problem_file.write("TYPE: TSP\n")
         problem_file.write("COMMENT: temporary CVRP or TSP problem\n")
         problem_file.write("DIMENSION: %d\n" % len(selected_idxs))
-        problem_file.write("EDGE_WEIGHT_TYPE: EXPLICIT\n")
-        problem_file.write("EDGE_WEIGHT_FORMAT: UPPER_ROW\n")
-        problem_file.write("EDGE_WEIGHT_SECTION\n")
-        for ii, i in enumerate(selected_idxs):
-            for j in selected_idxs[ii+1:]:
+        if points is not None:
+            xy = np.asarray(points)[selected_idxs]
+            problem_file.write("EDGE_WEIGHT_TYPE: %s\n"%edge_weight_type)
+            problem_file.write("NODE_COORD_SECTION\n")
+            problem_file.write("".join("%d %s %s\n"%(k, x, y) for k, (x, y) in
+                                       enumerate(zip(_format_values(xy[:,0]),
+                                                     _format_values(xy[:,1])), start=1)))
+        else:
+            problem_file.write("EDGE_WEIGHT_TYPE: EXPLICIT\n")
+            problem_file.write("EDGE_WEIGHT_FORMAT: UPPER_ROW\n")
+            problem_file.write("EDGE_WEIGHT_SECTION\n")
+            # one formatted line per row, streamed: the matrix is never
+            #  converted to text as a whole
+            for ii, i in enumerate(selected_idxs[:-1]):
+                row = D[i, selected_idxs[ii+1:]]
                 if float_to_int_precision is not None:
-                    problem_file.write(str(int(D[i,j]*float_to_int_precision)))
-                else:
-                    problem_file.write(str(D[i,j]))
-                problem_file.write(" ")
-            if ii!=len(selected_idxs)-1:
-                problem_file.write("\n")
+                    row = (row*float_to_int_precision).astype(np.int64)
+                problem_file.write(" ".join(_format_values(np.asarray(row))))
+                problem_file.write(" \n")
         if write_cvrp:
             problem_file.write("DEMAND_SECTION\n1 0\n")
-            if d:
-                for i in range(2,len(d)+1):
-                    problem_file.write("%d %d\n"%(i, int(d[i-1])))
+            if d is not None and len(d)>0:
+                problem_file.write("".join("%d %d\n"%(i, int(d[i-1])) for i in range(2,len(d)+1)))
             else:
-                for i in range(2,len(D)+1):
-                    problem_file.write("%d 1\n"%i)
+                problem_file.write("".join("%d 1\n"%i for i in range(2,size+1)))
             problem_file.write("DEPOT_SECTION\n")
             problem_file.write("1\n")
             problem_file.write("-1\n")
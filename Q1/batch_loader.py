@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:05:31 2026
+
+@author: pierreadrienlefevre
+
+Description: Chargement en lot des instances d'un dossier de benchmark
+(A-, X-, ORTEC-... comme celles de Q4/). Les instances et leurs solutions de
+référence (.sol ou .opt du même nom) sont lues en parallèle par un pool de
+processus, et rendues au fur et à mesure qu'elles sont prêtes : le premier
+solveur démarre sans attendre la lecture des suivantes.
+
+    for chemin, problem, (solution, cout, k) in iter_instances('Q4/', tsplib_rounding=True):
+        ...
+
+Les matrices de distances ne repassent pas par un pickle vers le processus
+parent : chaque processus écrit l'instance dans le cache d'instance_cache et
+le parent l'ouvre en mémoire partagée (np.load(mmap_mode='r')), sans copie.
+Les balayages suivants ne relisent plus rien. Pour ne rien écrire sur disque,
+donner un cache_dir en mémoire (sous /dev/shm).
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from instance_cache import load_TSPLIB_CVRP
+from TSPFile_reader import read_OPT_CVRP
+
+EXTENSIONS_INSTANCE = ('.vrp', '.tsp')
+EXTENSIONS_SOLUTION = ('.sol', '.opt')
+
+
+def find_instances(source):
+    """
+    Chemins triés des instances désignées par source : un dossier (ses
+    fichiers .vrp et .tsp), un motif glob, un chemin, ou une liste de ceux-ci.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = [source]
+    chemins = set()
+    for motif in map(os.fspath, source):
+        if os.path.isdir(motif):
+            motif = os.path.join(motif, '*')
+        chemins.update(c for c in glob.glob(motif)
+                       if os.path.splitext(c)[1].lower() in EXTENSIONS_INSTANCE)
+    return sorted(chemins)
+
+
+def reference_solution_path(path):
+    """Chemin de la solution de référence (.sol ou .opt du même nom), ou None."""
+    racine = os.path.splitext(path)[0]
+    for extension in EXTENSIONS_SOLUTION:
+        if os.path.isfile(racine + extension):
+            return racine + extension
+    return None
+
+
+def _prepare(path, cache_dir, options):
+    """
+    Exécuté dans un processus du pool : lit l'instance et l'écrit dans le
+    cache, puis lit la solution de référence. Seule la solution (petite) est
+    renvoyée au parent, la matrice reste dans le cache.
+    """
+    load_TSPLIB_CVRP(path, cache_dir=cache_dir, **options)
+    reference = reference_solution_path(path)
+    return read_OPT_CVRP(reference) if reference else None
+
+
+def iter_instances(source, workers=None, cache_dir=None, mmap_mode='r', **options):
+    """
+    Génère (chemin, ProblemDefinition, référence) pour chaque instance de
+    source (voir find_instances), dans l'ordre où leur lecture se termine.
+    référence est le (solution, coût, nombre de véhicules) de read_OPT_CVRP,
+    ou None sans fichier de solution. options est passé à read_TSPLIB_CVRP
+    (tsplib_rounding, dtype, dense...).
+
+    workers : nombre de processus (os.cpu_count() par défaut). Une erreur de
+    lecture est levée au moment où l'instance concernée serait rendue.
+    """
+    chemins = find_instances(source)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        taches = {pool.submit(_prepare, chemin, cache_dir, options): chemin
+                  for chemin in chemins}
+        for tache in as_completed(taches):
+            chemin = taches[tache]
+            reference = tache.result()
+            # Entrée écrite par le processus : ouverte en mémoire partagée
+            problem = load_TSPLIB_CVRP(chemin, cache_dir=cache_dir,
+                                       mmap_mode=mmap_mode, **options)
+            yield chemin, problem, reference
+    finally:
+        # Boucle interrompue : les lectures pas encore commencées sont annulées
+        pool.shutdown(cancel_futures=True)
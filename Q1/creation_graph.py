@@ -8,12 +8,15 @@ Created on Sat Feb 10 16:08:13 2024
 
 
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
+
+# matplotlib, seaborn et pandas ne sont importés qu'au premier tracé : les
+# heuristiques qui importent ce module restent utilisables sans affichage.
 
 def graph(coords, tour, distance=None, iteration=None, nom_algo = None):
-    
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import pandas as pd
+
     coordinates_df = pd.DataFrame(coords, columns=["x", "y"])
     coords = coordinates_df.values
     
@@ -74,5 +77,11 @@ def graph(coords, tour, distance=None, iteration=None, nom_algo = None):
 
     # Afficher le graphique
     plt.show()
-    
-    
+
+
+def graph_observer(coords, nom_algo=None):
+    """Observateur à passer en paramètre `trace` d'une heuristique : trace
+    chaque instantané (iteration, tour, distance) reçu avec graph."""
+    def trace(iteration, tour, distance=None):
+        graph(coords, list(tour), distance, iteration, nom_algo)
+    return trace
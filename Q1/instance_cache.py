@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:12:09 2026
+
+@author: pierreadrienlefevre
+
+Description: Cache disque des instances déjà lues. Le résultat de
+read_TSPLIB_CVRP (ou de vrplib.read_instance) est enregistré en fichiers
+.npy, un par tableau, plus un meta.json pour les valeurs simples, dans un
+dossier nommé d'après le hash SHA-256 du contenu du fichier et des options
+de lecture. Les chargements suivants ouvrent les tableaux avec
+np.load(mmap_mode='r') : la matrice des distances n'est ni relue ni
+recalculée, et les processus qui résolvent la même instance partagent les
+mêmes pages mémoire. Un fichier modifié a un autre hash, donc une autre
+entrée : le cache n'est jamais périmé.
+
+    problem = load_TSPLIB_CVRP('X-n1001-k43.vrp', tsplib_rounding=True, dtype='compact')
+    instance = load_vrplib_instance('X-n1001-k43.vrp')
+
+Le dossier du cache est $TSP_VRP_CACHE, ou ~/.cache/tsp_vrp par défaut.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from TSPFile_reader import DistanceOracle, ProblemDefinition, read_TSPLIB_CVRP
+
+# À incrémenter quand le format du cache ou le résultat des lecteurs change
+CACHE_VERSION = 2
+
+
+def cache_directory():
+    """Dossier du cache : $TSP_VRP_CACHE, sinon ~/.cache/tsp_vrp."""
+    return os.environ.get('TSP_VRP_CACHE',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'tsp_vrp'))
+
+
+def _option(valeur):
+    """Forme JSON stable d'une option de lecture (les dtypes par leur nom)."""
+    if valeur is None or isinstance(valeur, (bool, int, float, str)):
+        return valeur
+    return np.dtype(valeur).name
+
+
+def _entry(file_name, lecteur, options, cache_dir):
+    """Dossier de l'entrée : hash du contenu du fichier, du lecteur et des options."""
+    h = hashlib.sha256()
+    entete = {'version': CACHE_VERSION, 'lecteur': lecteur,
+              'options': {k: _option(v) for k, v in options.items()}}
+    h.update(json.dumps(entete, sort_keys=True).encode())
+    with open(file_name, 'rb') as fh:
+        for bloc in iter(lambda: fh.read(1 << 20), b''):
+            h.update(bloc)
+    return os.path.join(cache_dir or cache_directory(), f"{lecteur}-{h.hexdigest()}")
+
+
+def _json(valeur):
+    """Convertit les scalaires et tableaux NumPy restants pour json.dump."""
+    if isinstance(valeur, np.generic):
+        return valeur.item()
+    if isinstance(valeur, np.ndarray):
+        return valeur.tolist()
+    raise TypeError(f"{type(valeur).__name__} ne peut pas être mis en cache")
+
+
+def _store(entry, tableaux, meta):
+    """
+    Écrit l'entrée dans un dossier temporaire puis le renomme : un autre
+    processus ne voit jamais une entrée à moitié écrite. Si un autre
+    processus a écrit la même entrée entre-temps, la sienne est gardée.
+    """
+    tmp = f"{entry}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    try:
+        for nom, tableau in tableaux.items():
+            np.save(os.path.join(tmp, nom + '.npy'), tableau, allow_pickle=False)
+        meta = dict(meta, tableaux=sorted(tableaux))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as fh:
+            json.dump(meta, fh, default=_json)
+        os.rename(tmp, entry)
+    except OSError:
+        if not os.path.isdir(entry):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load(entry, mmap_mode):
+    """Retourne (tableaux mappés en mémoire, meta) de l'entrée, ou None si absente."""
+    try:
+        with open(os.path.join(entry, 'meta.json')) as fh:
+            meta = json.load(fh)
+    except FileNotFoundError:
+        return None
+    tableaux = {nom: np.load(os.path.join(entry, nom + '.npy'), mmap_mode=mmap_mode)
+                for nom in meta['tableaux']}
+    return tableaux, meta
+
+
+def _tableau(valeurs):
+    """
+    Liste (de listes) de read_TSPLIB_CVRP en tableau de float, et masque des
+    valeurs None (points ou demandes manquants, complétés par le lecteur),
+    ou None si aucune ne manque.
+    """
+    valeurs = np.array(valeurs, dtype=object)
+    absent = np.equal(valeurs, None)
+    return np.where(absent, np.nan, valeurs).astype(float), (absent if absent.any() else None)
+
+
+def _liste(tableaux, nom):
+    """Inverse de _tableau : les valeurs masquées redeviennent None."""
+    if nom not in tableaux:
+        return None
+    if nom + '_absent' in tableaux:
+        return np.where(tableaux[nom + '_absent'], None, tableaux[nom]).tolist()
+    return tableaux[nom].tolist()
+
+
+def load_TSPLIB_CVRP(file_name, cache_dir=None, mmap_mode='r', **options):
+    """
+    read_TSPLIB_CVRP(file_name, **options) avec cache disque. Le résultat est
+    le même ProblemDefinition ; la matrice des distances est un tableau
+    mappé en mémoire en lecture seule (mmap_mode='r'), ou un DistanceOracle
+    reconstruit à partir de ses points, sans calcul.
+    """
+    entry = _entry(file_name, 'tsplib', options, cache_dir)
+    contenu = _load(entry, mmap_mode)
+    if contenu is None:
+        problem = read_TSPLIB_CVRP(file_name, **options)
+        tableaux, meta = {}, {'size': problem.size,
+                              'capacity_constraint': problem.capacity_constraint,
+                              'edge_weight_type': problem.edge_weight_type}
+        for champ in ('coordinate_points', 'display_coordinate_points', 'customer_demands'):
+            if getattr(problem, champ) is not None:
+                tableaux[champ], absent = _tableau(getattr(problem, champ))
+                if absent is not None:
+                    tableaux[champ + '_absent'] = absent
+        D = problem.distance_matrix
+        if isinstance(D, DistanceOracle):
+            # Seuls les points de l'oracle sont enregistrés, pas les distances
+            tableaux['oracle_points'] = D.points
+            meta['oracle'] = {'tsplib_distances_type': D.tsplib_distances_type,
+                              'tsplib_rounding': D.tsplib_rounding,
+                              'dtype': D.dtype.name, 'cache_rows': D.cache_rows}
+        elif D is not None:
+            tableaux['distance_matrix'] = np.asarray(D)
+        _store(entry, tableaux, meta)
+        contenu = _load(entry, mmap_mode)
+    tableaux, meta = contenu
+
+    if 'oracle' in meta:
+        D = DistanceOracle(tableaux['oracle_points'], **meta['oracle'])
+    else:
+        D = tableaux.get('distance_matrix')
+    return ProblemDefinition(meta['size'], _liste(tableaux, 'coordinate_points'),
+                             _liste(tableaux, 'display_coordinate_points'),
+                             _liste(tableaux, 'customer_demands'), D,
+                             meta['capacity_constraint'], meta['edge_weight_type'])
+
+
+def load_vrplib_instance(path, cache_dir=None, mmap_mode='r', **options):
+    """
+    vrplib.read_instance(path, **options) avec cache disque. Les valeurs
+    ndarray du dictionnaire (edge_weight, node_coord, demand...) sont
+    mappées en mémoire en lecture seule, les autres viennent de meta.json.
+    """
+    entry = _entry(path, 'vrplib', options, cache_dir)
+    contenu = _load(entry, mmap_mode)
+    if contenu is None:
+        import vrplib
+
+        instance = vrplib.read_instance(path, **options)
+        tableaux = {k: v for k, v in instance.items()
+                    if isinstance(v, np.ndarray) and v.dtype != object}
+        valeurs = {k: v for k, v in instance.items() if k not in tableaux}
+        _store(entry, tableaux, {'valeurs': valeurs})
+        contenu = _load(entry, mmap_mode)
+    tableaux, meta = contenu
+    return dict(meta['valeurs'], **tableaux)
@@ -6,8 +6,8 @@ Created on Sun Feb  4 22:23:13 2024
 @author: pierreadrienlefevre
 """
 
-"Assurez vous d'avoir dans le meme dossier les fichiers LireFichierTSP"
-"et creation_graph et le dossier verypy"
+"Assurez vous d'avoir dans le meme dossier le fichier creation_graph"
+"et le dossier verypy (le lecteur TSPFile_reader est lu dans Q1)"
 'Installer les packages suivants :'
 
 'pip install numpy'
@@ -19,20 +19,12 @@ Created on Sun Feb  4 22:23:13 2024
 
 from builtins import range
 from itertools import groupby    
-from logging import log, DEBUG
+from logging import log, DEBUG, getLogger
 from verypy.util import routes2sol, objf
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from LireFichierTSP import read_TSPLIB_CVRP
 from verypy.config import CAPACITY_EPSILON as C_EPS
 from verypy.config import COST_EPSILON as S_EPS
 import time
-from creation_graph import graph
-
-
-# Enregistrer le temps de début
-start_time = time.time()
 
 
 def sol2routes(sol):
@@ -42,21 +34,66 @@ def sol2routes(sol):
     if not sol or len(sol)<=2: return []
     return [[0]+list(r)+[0] for x, r in groupby(sol, lambda z: z == 0) if not x]
 
+def _sort_savings(D, I, J):
+    """Trie les paires (I, J) par saving décroissant, puis par -D[i,j]
+    décroissant, puis par i et j décroissants (ordre du tri des tuples
+    (s, -D[i,j], i, j) en sens inverse). Retourne (savings, I, J)."""
+    D_ij = D[I, J]
+    savings = D[I, 0] + D[0, J] - D_ij
+    ordre = np.lexsort((-J, -I, D_ij, -savings))
+    return savings[ordre], I[ordre], J[ordre]
+
 def clarke_wright_savings_function(D):
+    """Savings s_ij = D[i,0]+D[0,j]-D[i,j] de toutes les paires 1 <= i < j,
+    calculés d'un bloc par NumPy sur le triangle supérieur et triés par
+    saving décroissant. Retourne trois tableaux (savings, I, J)."""
+    if not hasattr(D, 'shape'):  # un tableau ou un DistanceOracle est gardé tel quel
+        D = np.asarray(D)
+    if D.dtype.kind == 'u':  # uint16 : les savings peuvent être négatifs
+        D = D.astype(np.int32)
     N = len(D)
-    n = N-1
-    savings = [None]*int((n*n-n)/2)
-    idx = 0
-    for i in range(1,N):
-        for j in range(i+1,N):
-            s = D[i,0]+D[0,j]-D[i,j]
-            savings[idx] = (s,-D[i,j],i,j)
-            idx+=1
-    savings.sort(reverse=True)
-    #print(savings)
-    return savings 
+    I, J = np.triu_indices(N-1, 1)
+    I = (I+1).astype(np.int32)
+    J = (J+1).astype(np.int32)
+    return _sort_savings(D, I, J)
+
+def neighbor_savings_function(D, k=30):
+    """Savings limités aux paires (i, j) où j est l'un des k plus proches
+    clients de i (ou l'inverse) : O(nk) paires au lieu de O(n²), pour les
+    instances de plus de 10 000 clients. Même format de retour que
+    clarke_wright_savings_function ; à passer en savings_callback via
+    functools.partial(neighbor_savings_function, k=...)."""
+    if not hasattr(D, 'shape'):  # un tableau ou un DistanceOracle est gardé tel quel
+        D = np.asarray(D)
+    if D.dtype.kind == 'u':  # uint16 : les savings peuvent être négatifs
+        D = D.astype(np.int32)
+    N = len(D)
+    k = min(k, N-2)
+    if k < 1:
+        return clarke_wright_savings_function(D)
+    proches = np.empty((N-1, k), dtype=np.int32)
+    # Parcours de la matrice par blocs de lignes pour borner la mémoire
+    bloc = max(1, 2**20 // N)
+    for debut in range(1, N, bloc):
+        fin = min(N, debut+bloc)
+        lignes = np.array(D[debut:fin, 1:], dtype=float)
+        lignes[np.arange(fin-debut), np.arange(debut-1, fin-1)] = np.inf
+        proches[debut-1:fin-1] = np.argpartition(lignes, k-1, axis=1)[:, :k] + 1
+    clients = np.repeat(np.arange(1, N, dtype=np.int32), k)
+    proches = proches.ravel()
+    # Chaque paire une seule fois, avec i < j
+    paires = np.unique(np.minimum(clients, proches).astype(np.int64)*N
+                       + np.maximum(clients, proches))
+    I = (paires // N).astype(np.int32)
+    J = (paires % N).astype(np.int32)
+    return _sort_savings(D, I, J)
 
 def update_plot(routes, coordinates):
+    # Import à la demande : le solveur ne charge jamais matplotlib ni seaborn
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.ion()  # Active le mode interactif
     plt.clf()  # Efface la figure actuelle
 
     # Appliquer le thème de Seaborn pour le style
@@ -90,13 +127,15 @@ def update_plot(routes, coordinates):
     plt.show(block=False)  # Affiche sans bloquer le code suivant
 
 def parallel_savings_init(D, d, C, L=None, minimize_K=False,
-                          savings_callback=clarke_wright_savings_function, trace_graph = False):
-
-    # Configuration initiale du graphique
-    plt.ion()  # Active le mode interactif
-    plt.figure(figsize=(10, 6))
+                          savings_callback=clarke_wright_savings_function, trace=None):
+    """Parallel savings construction, without any plotting. `trace`, if given,
+    is an observer called after each merge as trace(iteration, routes, (i, j))
+    with a snapshot (copy) of the current non-empty routes."""
     
     N = len(D)
+    # debug messages are only built when someone listens to them
+    debug_log = __debug__ and getLogger().isEnabledFor(DEBUG-1)
+    iteration = 0
     ignore_negative_savings = not minimize_K
     
     ## 1. make route for each customer
@@ -105,24 +144,20 @@ def parallel_savings_init(D, d, C, L=None, minimize_K=False,
     if L: route_costs = [D[0,i]+D[i,0] for i in range(1,N)]
     
     try:
-        ## 2. compute initial savings 
-        savings = savings_callback(D)
+        ## 2. compute initial savings (sorted arrays, best first)
+        savings, I, J = savings_callback(D)
+        if ignore_negative_savings:
+            # savings are sorted: keep the non-negative prefix only
+            nb_positive = int(np.count_nonzero(savings >= 0.0))
+            I, J = I[:nb_positive], J[:nb_positive]
         
         # zero based node indexing!
         endnode_to_route = [0]+list(range(0,N-1))
         
         ## 3. merge
-        # Get potential merges best savings first (second element is secondary
-        #  sorting criterion, and it it ignored)
-        for best_saving, _, i, j in savings:
-            #if __debug__:
-               # log(DEBUG-1, "Popped savings s_{%d,%d}=%.2f" % (i,j,best_saving))
-                
-            if ignore_negative_savings:
-                cw_saving = D[i,0]+D[0,j]-D[i,j]
-                if cw_saving<0.0:
-                    break
-                
+        # Get potential merges best savings first, streamed from the sorted
+        #  index arrays
+        for i, j in zip(I.tolist(), J.tolist()):
             left_route = endnode_to_route[i]
             right_route = endnode_to_route[j]
             
@@ -132,7 +167,7 @@ def parallel_savings_init(D, d, C, L=None, minimize_K=False,
                 (left_route==right_route)):
                 continue
             
-            if __debug__:
+            if debug_log:
                 log(DEBUG-1, "Route #%d : %s"%
                              (left_route, str(routes[left_route])))
                 log(DEBUG-1, "Route #%d : %s"%
@@ -142,7 +177,7 @@ def parallel_savings_init(D, d, C, L=None, minimize_K=False,
             if C:
                 merged_demand = route_demands[left_route]+route_demands[right_route]
                 if merged_demand-C_EPS > C:
-                    if __debug__:
+                    if debug_log:
                         log(DEBUG-1, "Reject merge due to "+
                             "capacity constraint violation")
                     continue
@@ -152,17 +187,11 @@ def parallel_savings_init(D, d, C, L=None, minimize_K=False,
                                 route_costs[right_route]-D[0,j]+\
                                 D[i,j]
                 if merged_cost-S_EPS > L:
-                    if __debug__:
+                    if debug_log:
                         log(DEBUG-1, "Reject merge due to "+
                             "maximum route length constraint violation")
                     continue
             
-            if trace_graph == True : 
-                # Avant la tentative de fusion
-                print("Tentative de fusion des itinéraires pour les clients {} et {}".format(i, j))
-                for route_index, route in enumerate(routes, start=1):
-                    print("Itinéraire avant fusion #{} : {}".format(route_index, route))
-        
             # update bookkeeping only on the recieving (left) route
             if C: route_demands[left_route] = merged_demand
             if L: route_costs[left_route] = merged_cost
@@ -187,18 +216,14 @@ def parallel_savings_init(D, d, C, L=None, minimize_K=False,
             routes[left_route].extend( routes[right_route] )
             routes[right_route] = None
             
-            if __debug__:
+            if debug_log:
                 dbg_sol = routes2sol(routes)
                 log(DEBUG-1, "Merged, resulting solution is %s (%.2f)"%
                              (str(dbg_sol), objf(dbg_sol,D)))
                 
-            if trace_graph == True :     
-                if __debug__:
-                    print("Après fusion des itinéraires pour les clients {} et {}".format(i, j))
-                    for route_index, route in enumerate(routes, start=1):
-                        print("Itinéraire après fusion #{} : {}".format(route_index, route))
-                    print("---" * 10)  # Séparateur pour plus de clarté entre les itérations
-                    update_plot(routes, coordinates)
+            iteration += 1
+            if trace is not None:
+                trace(iteration, [list(r) for r in routes if r], (i, j))
 
     except KeyboardInterrupt: # or SIGINT
         interrupted_sol = routes2sol(routes)
@@ -215,72 +240,93 @@ def calculate_tour_cost(matrix, tour):
 
 
     
-# =============================================================================
-# Data
-# ============================================================================
-
-problem = read_TSPLIB_CVRP('Q2_3.tsp')
-distance_matrix = problem.distance_matrix
-coordinates= np.array(problem.coordinate_points)
-# =============================================================================
-# Main
-# =============================================================================
-
-
-route = parallel_savings_init(
-    D=distance_matrix, 
-    d=problem.customer_demands, 
-    C=problem.capacity_constraint )
-
-distance = calculate_tour_cost(distance_matrix, route )
-
-
-# =============================================================================
-# Modification pour affichage
-# =============================================================================
-# Vérifier si le premier élément de la liste est 0
-if route[0] == 0:
-    # Si oui, incrémenter chaque élément de la liste de 1
-    route = [x + 1 for x in route]
-# Sinon, ne rien faire (la liste reste inchangée)
-
-# Vérifier si le premier élément de la liste est déjà 1
-if route[0] != 1:
-    # Trouver l'index de 1 dans la route
-    index_of_one = route.index(1)
-
-    # Réarranger la route pour commencer par 1, en supprimant le 1 final si nécessaire
-    route = route[index_of_one:] + route[:index_of_one]
-    if route[-1] == 1:
-        route.pop()  # Supprime le dernier élément si c'est 1 pour éviter la répétition
-
-    # Ajouter 1 à la fin si nécessaire pour boucler le retour au point de départ
-    if route[-1] != 1:
-        route.append(1)
-    
-
-# =============================================================================
-# Temps d'execution
-# =============================================================================
-# Enregistrer le temps de fin
-end_time = time.time()
-
-# Calculer le temps d'exécution
-execution_time = end_time - start_time
-num_points = distance_matrix.shape[0]
-
-# Calculer le temps d'exécution par point
-time_per_point = execution_time / num_points
-
-
-# =============================================================================
-# Affichage
-# =============================================================================
-print(f"La route est : {route}")
-print(f"La distance totale est : {distance}")
-graph(np.array(problem.coordinate_points),route, distance, nom_algo= 'Clark and Wright')
-
-print(f"Le temps d'exécution total est de {execution_time} secondes.")
-print(f"Le temps d'exécution par point est de {time_per_point} secondes par point.")
-
-#%%
+if __name__ == '__main__':
+    import os
+    import sys
+    # Le lecteur d'instances est dans Q1
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Q1'))
+    from TSPFile_reader import read_TSPLIB_CVRP
+    from creation_graph import graph
+
+    # Enregistrer le temps de début
+    start_time = time.time()
+
+    # =============================================================================
+    # Data
+    # ============================================================================
+
+    problem = read_TSPLIB_CVRP('Q2_3.tsp')
+    distance_matrix = problem.distance_matrix
+    coordinates= np.array(problem.coordinate_points)
+    trace_graph = False
+
+    def trace_fusions(iteration, routes, fusion):
+        print("Après fusion des itinéraires pour les clients {} et {}".format(*fusion))
+        for route_index, route in enumerate(routes, start=1):
+            print("Itinéraire après fusion #{} : {}".format(route_index, route))
+        print("---" * 10)  # Séparateur pour plus de clarté entre les itérations
+        update_plot(routes, coordinates)
+
+    # =============================================================================
+    # Main
+    # =============================================================================
+
+
+    route = parallel_savings_init(
+        D=distance_matrix, 
+        d=problem.customer_demands, 
+        C=problem.capacity_constraint,
+        trace=trace_fusions if trace_graph else None)
+
+    distance = calculate_tour_cost(distance_matrix, route )
+
+
+    # =============================================================================
+    # Modification pour affichage
+    # =============================================================================
+    # Vérifier si le premier élément de la liste est 0
+    if route[0] == 0:
+        # Si oui, incrémenter chaque élément de la liste de 1
+        route = [x + 1 for x in route]
+    # Sinon, ne rien faire (la liste reste inchangée)
+
+    # Vérifier si le premier élément de la liste est déjà 1
+    if route[0] != 1:
+        # Trouver l'index de 1 dans la route
+        index_of_one = route.index(1)
+
+        # Réarranger la route pour commencer par 1, en supprimant le 1 final si nécessaire
+        route = route[index_of_one:] + route[:index_of_one]
+        if route[-1] == 1:
+            route.pop()  # Supprime le dernier élément si c'est 1 pour éviter la répétition
+
+        # Ajouter 1 à la fin si nécessaire pour boucler le retour au point de départ
+        if route[-1] != 1:
+            route.append(1)
+
+
+    # =============================================================================
+    # Temps d'execution
+    # =============================================================================
+    # Enregistrer le temps de fin
+    end_time = time.time()
+
+    # Calculer le temps d'exécution
+    execution_time = end_time - start_time
+    num_points = distance_matrix.shape[0]
+
+    # Calculer le temps d'exécution par point
+    time_per_point = execution_time / num_points
+
+
+    # =============================================================================
+    # Affichage
+    # =============================================================================
+    print(f"La route est : {route}")
+    print(f"La distance totale est : {distance}")
+    graph(np.array(problem.coordinate_points),route, distance, nom_algo= 'Clark and Wright')
+
+    print(f"Le temps d'exécution total est de {execution_time} secondes.")
+    print(f"Le temps d'exécution par point est de {time_per_point} secondes par point.")
+
+    #%%
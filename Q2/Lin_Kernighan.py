@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:05:17 2026
+
+@author: pierreadrienlefevre
+
+Description: Recherche locale de Lin-Kernighan à profondeur variable. Chaque
+mouvement est une suite d'échanges séquentiels (jusqu'à 5) : l'arête (t1,t2)
+est retirée, t2 est relié à un voisin t3, l'arête (t3,t4) est retirée et t4
+devient la nouvelle extrémité. La suite est poursuivie tant que le gain
+partiel reste positif, et seul le meilleur préfixe est conservé. Les listes
+de voisins et les bits "don't look" limitent l'exploration.
+"""
+
+import time
+
+import numpy as np
+
+from local_search import (EPSILON, calculate_total_distance, neighbor_lists,
+                          _active_queue, _as_array_tour, _as_distances)
+
+# Nombre d'alternatives essayées à chaque niveau (au-delà : 1)
+LARGEUR = (5, 3, 1)
+
+
+def lin_kernighan(tour_initial, distance_matrix, temps_max, voisins=None,
+                  profondeur_max=5, trace=None):
+    """
+    Lin-Kernighan en première amélioration à partir de tour_initial.
+
+    `voisins` est un tableau (n, K) de plus proches voisins (voir
+    local_search.neighbor_lists), calculé sur la matrice avec K=10 s'il est
+    absent. `trace(iteration, tour, distance)` est appelé après chaque
+    amélioration. Retourne (tour, distance), dans le même format que le tour
+    de départ ; un ArrayTour est modifié sur place.
+    """
+    start_time = time.time()
+    D = _as_distances(distance_matrix)
+    if voisins is None:
+        voisins = neighbor_lists(D, k=10)
+    voisins = np.asarray(voisins).tolist()
+    tour, restitue = _as_array_tour(tour_initial, len(D))
+    pos = tour.pos
+
+    distance = calculate_total_distance(tour, D)
+    iteration = 0
+    file, actif = _active_queue(tour, len(D))
+
+    pile = []         # échanges appliqués (t2, t3, t4) de la suite en cours
+    ajoutees = set()  # arêtes ajoutées par la suite, qui ne peuvent plus être retirées
+
+    def recherche(t1, t2, G, niveau, seuil):
+        """
+        Prolonge la suite depuis l'extrémité t2, avec G le gain partiel
+        (arêtes retirées moins arêtes ajoutées, hors arête de fermeture).
+        Retourne le gain total d'une amélioration supérieure à `seuil`,
+        laissée appliquée, ou 0 après avoir tout annulé.
+        """
+        t1_avant_t2 = tour.prev(t2) == t1
+        candidats = []
+        for t3 in voisins[t2]:
+            g = G - D[t2, t3]
+            if g <= EPSILON:
+                break
+            if pos[t3] < 0 or t3 == t1:
+                continue
+            # t4 est du même côté de t3 que t1 de t2, pour que l'échange reste un tour
+            t4 = tour.prev(t3) if t1_avant_t2 else tour.next(t3)
+            if t4 == t2 or t4 == t1 or frozenset((t3, t4)) in ajoutees:
+                continue
+            candidats.append((D[t3, t4] - D[t2, t3], t3, t4))
+        candidats.sort(reverse=True)
+
+        largeur = LARGEUR[niveau] if niveau < len(LARGEUR) else 1
+        for _, t3, t4 in candidats[:largeur]:
+            tour.two_opt_move(t2, t1, t3, t4)
+            pile.append((t2, t3, t4))
+            ajoutees.add(frozenset((t2, t3)))
+
+            G2 = G - D[t2, t3] + D[t3, t4]
+            fermeture = G2 - D[t4, t1]
+            meilleur = max(seuil, fermeture)
+            if niveau + 1 < profondeur_max:
+                profond = recherche(t1, t4, G2, niveau + 1, meilleur)
+                if profond:
+                    return profond
+            if fermeture > seuil + EPSILON:
+                return fermeture
+
+            ajoutees.discard(frozenset((t2, t3)))
+            pile.pop()
+            tour.two_opt_move(t3, t2, t4, t1)  # annule l'échange
+        return 0
+
+    while file:
+        if (time.time() - start_time) > temps_max:
+            print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+            break
+
+        t1 = file.popleft()
+        actif[t1] = False
+        for t2 in (tour.next(t1), tour.prev(t1)):
+            gain = recherche(t1, t2, D[t1, t2], 0, 0)
+            if not gain:
+                continue
+
+            distance -= gain
+            iteration += 1
+            for ville in [t1] + [v for echange in pile for v in echange]:
+                if not actif[ville]:
+                    actif[ville] = True
+                    file.append(ville)
+            pile.clear()
+            ajoutees.clear()
+            if trace is not None:
+                trace(iteration, restitue(tour), distance)
+            break
+
+    return restitue(tour), calculate_total_distance(tour, D)
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    # Le lecteur d'instances est dans Q1
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Q1'))
+    from TSPFile_reader import read_TSPLIB_CVRP
+    from creation_graph import graph
+
+    # Enregistrer le temps de début
+    start_time = time.time()
+
+    # =============================================================================
+    # Data
+    # ============================================================================
+
+    problem = read_TSPLIB_CVRP('Q2_3.tsp')
+    distance_matrix = problem.distance_matrix
+    coordinates = np.array(problem.coordinate_points)
+    temps_max = 600
+    K_voisins = 10
+    voisins = neighbor_lists(coordinates=coordinates, k=K_voisins)
+
+    # =============================================================================
+    # Main
+    # =============================================================================
+
+    # Tour de départ : les villes dans l'ordre du fichier, fermé sur la ville 0
+    tour_initial = list(range(len(distance_matrix))) + [0]
+
+    route, distance = lin_kernighan(tour_initial, distance_matrix, temps_max, voisins)
+
+    # =============================================================================
+    # Temps d'execution
+    # =============================================================================
+    execution_time = time.time() - start_time
+    time_per_point = execution_time / distance_matrix.shape[0]
+
+    # =============================================================================
+    # Affichage
+    # =============================================================================
+    print(f"La meilleur route est : {[x + 1 for x in route]}")
+    print(f"La distance du tour est de : {distance}")
+    graph(coordinates, route, distance, nom_algo='Lin-Kernighan')
+
+    print(f"Le temps d'exécution total est de {execution_time} secondes.")
+    print(f"Le temps d'exécution par point est de {time_per_point} secondes par point.")
@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:41 2026
+
+@author: pierreadrienlefevre
+
+Description: Recherche locale 2-opt avec évaluation incrémentale (delta) des
+mouvements. Un échange (i, k) est évalué à partir des quatre extrémités des
+deux arêtes retirées, sans reconstruire ni re-sommer le tour. Seule
+l'inversion retenue est appliquée, sur place.
+
+Les listes de voisins (k plus proches villes) et les bits "don't look"
+limitent l'exploration aux mouvements prometteurs sur les grandes instances.
+Le module fournit aussi l'Or-opt (déplacement d'une chaîne de 1 à 3 villes),
+un 3-opt par inversions de segments et une descente à voisinages variables
+(VND) qui enchaîne les opérateurs.
+
+Les opérateurs travaillent sur un ArrayTour (tour_array.py) : successeurs,
+prédécesseurs et positions en O(1), inversions vectorisées du côté le plus
+court. Un ArrayTour passé en entrée est modifié sur place et retourné tel
+quel, ce qui évite les conversions quand les opérateurs s'enchaînent.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+from tour_array import ArrayTour
+
+# Tolérance en dessous de laquelle un gain est considéré comme du bruit numérique
+EPSILON = 1e-9
+
+
+def _as_distances(distance_matrix):
+    """
+    Matrice des distances utilisable par les opérateurs. Un objet qui a déjà
+    une forme (tableau NumPy, DistanceOracle du lecteur TSPLIB qui calcule
+    les distances à la demande) est gardé tel quel : np.asarray construirait
+    la matrice dense de l'oracle. Les matrices int32 et float32 sont
+    utilisées directement ; une matrice uint16 (stockage compact) est passée
+    en int32, car les gains des mouvements sont des différences de distances
+    qui peuvent être négatives.
+    """
+    if not hasattr(distance_matrix, 'shape'):
+        return np.asarray(distance_matrix)
+    if distance_matrix.dtype.kind == 'u':
+        return distance_matrix.astype(np.int32)
+    return distance_matrix
+
+
+def calculate_total_distance(tour, distance_matrix):
+    """
+    Distance totale du tour, retour au point de départ compris. La somme est
+    faite en float64 : exacte pour des distances entières, quel que soit le
+    type de stockage de la matrice.
+    """
+    tour = np.asarray(tour)
+    return float(distance_matrix[tour[:-1], tour[1:]].sum(dtype=np.float64)
+                 + distance_matrix[tour[-1], tour[0]])
+
+
+def two_opt_delta(tour_initial, distance_matrix, temps_max, trace=None):
+    """
+    2-opt en meilleure amélioration, évalué par delta.
+
+    Explore le même voisinage que `two_opt` de 2-OPT.py (i de 1 à n-2, k de
+    i+1 à n-1) et retient le même mouvement à chaque passe : le coût final est
+    donc identique pour un même tour de départ. Le tour est traité comme
+    cyclique, qu'il répète ou non la ville de départ à la fin.
+
+    `trace(iteration, tour, distance)` est appelé après chaque amélioration.
+    Retourne (tour, distance) ; un ArrayTour est modifié sur place.
+    """
+    start_time = time.time()
+    D = _as_distances(distance_matrix)
+    if isinstance(tour_initial, ArrayTour):
+        array_tour = tour_initial
+        tour = array_tour.ordre
+    else:
+        array_tour = None
+        tour = np.array(tour_initial, dtype=np.intp)
+    n = len(tour)
+    distance = calculate_total_distance(tour, D)
+    iteration = 0
+
+    def resultat():
+        if array_tour is not None:
+            return array_tour, calculate_total_distance(tour, D)
+        return tour.tolist(), calculate_total_distance(tour, D)
+
+    while True:
+        # Successeurs et longueurs d'arêtes du tour courant, une fois par passe
+        succ = np.roll(tour, -1)
+        aretes = D[tour, succ]
+        best_delta, best_i, best_k = -EPSILON, None, None
+
+        for i in range(1, n - 1):
+            if (time.time() - start_time) > temps_max:
+                print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+                return resultat()
+
+            a, b = tour[i - 1], tour[i]
+            # Gain de tous les k > i : (a,b) + (c,d) remplacées par (a,c) + (b,d)
+            delta = (D[a, tour[i + 1:]] + D[b, succ[i + 1:]]
+                     - aretes[i - 1] - aretes[i + 1:])
+            k = int(np.argmin(delta))
+            if delta[k] < best_delta:
+                best_delta, best_i, best_k = delta[k], i, i + 1 + k
+
+        if best_i is None:
+            break
+
+        if array_tour is not None:
+            array_tour.reverse_positions(best_i, best_k, plus_court=False)
+        else:
+            tour[best_i:best_k + 1] = tour[best_i:best_k + 1][::-1]
+        distance += best_delta
+        iteration += 1
+        if trace is not None:
+            trace(iteration, tour.tolist(), distance)
+
+    return resultat()
+
+
+def neighbor_lists(distance_matrix=None, coordinates=None, k=10):
+    """
+    Retourne les k plus proches voisins de chaque ville, triés par distance
+    croissante, sous forme de tableau int32 (n, k). La ville elle-même est
+    exclue. Les coordonnées, si fournies, sont utilisées via un k-d tree ;
+    sinon la matrice des distances est parcourue par blocs de lignes.
+    """
+    if coordinates is not None:
+        from scipy.spatial import cKDTree
+
+        coords = np.asarray(coordinates, dtype=float)
+        n = len(coords)
+        k = min(k, n - 1)
+        _, idx = cKDTree(coords).query(coords, k=k + 1)
+        # Retirer la ville elle-même (pas forcément en tête si doublons)
+        masque = idx != np.arange(n)[:, None]
+        masque[masque.all(axis=1), -1] = False
+        return idx[masque].reshape(n, k).astype(np.int32)
+
+    D = _as_distances(distance_matrix)
+    n = len(D)
+    k = min(k, n - 1)
+    voisins = np.empty((n, k), dtype=np.int32)
+    bloc = max(1, 2**20 // n)
+    for debut in range(0, n, bloc):
+        fin = min(n, debut + bloc)
+        lignes = np.array(D[debut:fin], dtype=float)
+        lignes[np.arange(fin - debut), np.arange(debut, fin)] = np.inf
+        proches = np.argpartition(lignes, k - 1, axis=1)[:, :k]
+        ordre = np.take_along_axis(lignes, proches, axis=1).argsort(axis=1, kind='stable')
+        voisins[debut:fin] = np.take_along_axis(proches, ordre, axis=1)
+    return voisins
+
+
+def _as_array_tour(tour_initial, taille):
+    """
+    ArrayTour du tour de départ et fonction qui remet un ArrayTour dans le
+    format d'entrée. Un ArrayTour est utilisé tel quel ; une liste est
+    convertie et restituée avec la même ville de départ, fermée ou non.
+    """
+    if isinstance(tour_initial, ArrayTour):
+        return tour_initial, lambda tour: tour
+    villes = [int(v) for v in tour_initial]
+    ferme = len(villes) > 1 and villes[0] == villes[-1]
+    if ferme:
+        villes.pop()
+    depart = villes[0]
+
+    def restitue(tour):
+        resultat = tour.tolist(depart)
+        if ferme:
+            resultat.append(depart)
+        return resultat
+
+    return ArrayTour(villes, taille), restitue
+
+
+def _active_queue(tour, taille):
+    """File des villes actives (bits "don't look" levés) et indicateurs associés."""
+    file = deque(tour)
+    actif = [False] * taille
+    for ville in file:
+        actif[ville] = True
+    return file, actif
+
+
+def two_opt_neighbors(tour_initial, distance_matrix, temps_max, voisins, trace=None):
+    """
+    2-opt en première amélioration restreint aux listes de voisins.
+
+    Pour une ville a et son successeur (ou prédécesseur) b, seules les villes
+    c de voisins[a] plus proches de a que b sont essayées : au-delà, le gain
+    partiel D[a,b] - D[a,c] est négatif. Une file de villes actives tient lieu
+    de bits "don't look" : une ville sans mouvement améliorant sort de la
+    file et n'y revient que si l'une de ses arêtes est modifiée.
+
+    Retourne (tour, distance), dans le même format que le tour de départ.
+    """
+    start_time = time.time()
+    D = _as_distances(distance_matrix)
+    voisins = np.asarray(voisins).tolist()
+    tour, restitue = _as_array_tour(tour_initial, len(D))
+    ordre, pos, n = tour.ordre, tour.pos, tour.n
+
+    distance = calculate_total_distance(tour, D)
+    iteration = 0
+    file, actif = _active_queue(tour, len(D))
+
+    while file:
+        if (time.time() - start_time) > temps_max:
+            print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+            break
+
+        a = file.popleft()
+        actif[a] = False
+        for sens in (1, -1):
+            b = int(ordre[(pos[a] + sens) % n])
+            d_ab = D[a, b]
+            move = None
+            for c in voisins[a]:
+                d_ac = D[a, c]
+                if d_ac >= d_ab:
+                    break
+                if pos[c] < 0:
+                    continue
+                d = int(ordre[(pos[c] + sens) % n])
+                if c == b or d == a:
+                    continue
+                delta = d_ac + D[b, d] - d_ab - D[c, d]
+                if delta < -EPSILON:
+                    move = c, d, delta
+                    break
+            if move is None:
+                continue
+
+            c, d, delta = move
+            tour.two_opt_move(a, b, c, d)
+            distance += delta
+            iteration += 1
+            for ville in (a, b, c, d):
+                if not actif[ville]:
+                    actif[ville] = True
+                    file.append(ville)
+            if trace is not None:
+                trace(iteration, restitue(tour), distance)
+            break
+
+    return restitue(tour), calculate_total_distance(tour, D)
+
+
+def or_opt(tour_initial, distance_matrix, temps_max, voisins, trace=None, longueur_max=3):
+    """
+    Or-opt en première amélioration : déplace une chaîne de 1 à `longueur_max`
+    villes consécutives entre deux autres villes, éventuellement inversée.
+
+    Le gain d'un mouvement se calcule sur les six arêtes concernées : retirer
+    la chaîne a..z (de p..nx) rapporte G = D[p,a] + D[z,nx] - D[p,nx], et
+    l'insérer entre c et e coûte D[c,a] + D[z,e] - D[c,e]. Seules les villes
+    c de voisins[a] avec D[a,c] < G sont essayées, et la file de villes
+    actives sert de bits "don't look" comme dans `two_opt_neighbors`.
+
+    Retourne (tour, distance), dans le même format que le tour de départ.
+    """
+    start_time = time.time()
+    D = _as_distances(distance_matrix)
+    voisins = np.asarray(voisins).tolist()
+    tour, restitue = _as_array_tour(tour_initial, len(D))
+    ordre, pos, n = tour.ordre, tour.pos, tour.n
+
+    distance = calculate_total_distance(tour, D)
+    iteration = 0
+    file, actif = _active_queue(tour, len(D))
+
+    while file:
+        if (time.time() - start_time) > temps_max:
+            print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+            break
+
+        a = file.popleft()
+        actif[a] = False
+        move = None
+        for longueur in range(1, min(longueur_max, n - 3) + 1):
+            for sens in ((1,) if longueur == 1 else (1, -1)):
+                chaine = [int(ordre[(pos[a] + sens * idx) % n]) for idx in range(longueur)]
+                z = chaine[-1]
+                p = int(ordre[(pos[a] - sens) % n])
+                nx = int(ordre[(pos[z] + sens) % n])
+                gain = D[p, a] + D[z, nx] - D[p, nx]
+                for c in voisins[a]:
+                    d_ac = D[a, c]
+                    if d_ac >= gain:
+                        break
+                    if pos[c] < 0 or c in chaine:
+                        continue
+                    for e in (tour.next(c), tour.prev(c)):
+                        if e in chaine:
+                            continue
+                        delta = d_ac + D[z, e] - D[c, e] - gain
+                        if delta < -EPSILON:
+                            move = chaine, sens, c, e, delta, (p, nx)
+                            break
+                    if move is not None:
+                        break
+                if move is not None:
+                    break
+            if move is not None:
+                break
+
+        if move is None:
+            continue
+
+        chaine, sens, c, e, delta, (p, nx) = move
+        a, z = chaine[0], chaine[-1]
+        debut = tour.position(a if sens == 1 else z)
+        # Insertion entre u et son successeur w ; a doit être voisin de c
+        if tour.next(c) == e:
+            u, premier = c, a
+        else:
+            u, premier = e, z
+        tour.move_segment(debut, len(chaine), u, ordre[debut] != premier)
+        distance += delta
+        iteration += 1
+        for ville in (p, nx, a, z, c, e):
+            if not actif[ville]:
+                actif[ville] = True
+                file.append(ville)
+        if trace is not None:
+            trace(iteration, restitue(tour), distance)
+
+    return restitue(tour), calculate_total_distance(tour, D)
+
+
+# Les trois coupes (A,B), (C,D), (E,F) d'un tour A B..C D..E F admettent sept
+# reconnexions. Trois gardent une des arêtes et sont des 2-opt (inversion de
+# B..C, de D..E ou de B..E), trouvés à la profondeur 2 de la recherche. Les
+# quatre autres remplacent les trois arêtes ; chacune est décrite par ses
+# arêtes ajoutées et par la suite d'échanges 2-opt qui la réalise.
+CAS_3OPT = {
+    'a': ((('A', 'D'), ('E', 'B'), ('C', 'F')),   # A D..E B..C F
+          (('A', 'B', 'C', 'D'), ('A', 'C', 'E', 'F'), ('A', 'E', 'D', 'B'))),
+    'b': ((('A', 'E'), ('D', 'B'), ('C', 'F')),   # A E..D B..C F
+          (('A', 'B', 'C', 'D'), ('A', 'C', 'E', 'F'))),
+    'c': ((('A', 'D'), ('E', 'C'), ('B', 'F')),   # A D..E C..B F
+          (('A', 'B', 'E', 'F'), ('A', 'E', 'D', 'C'))),
+    'd': ((('A', 'C'), ('B', 'E'), ('D', 'F')),   # A C..B E..D F
+          (('A', 'B', 'C', 'D'), ('B', 'D', 'E', 'F'))),
+}
+
+
+def three_opt_neighbors(tour_initial, distance_matrix, temps_max, voisins, trace=None):
+    """
+    3-opt par inversions de segments, en première amélioration, restreint
+    aux listes de voisins.
+
+    Recherche séquentielle t1..t6 : (t1,t2) est une arête du tour, t3 un
+    voisin de t2, (t3,t4) une arête, t5 un voisin de t4 et (t5,t6) une arête.
+    Les gains partiels doivent rester positifs, ce qui borne l'exploration.
+    Le gain d'un mouvement ne dépend que des six arêtes retirées et ajoutées ;
+    le mouvement est appliqué par au plus trois inversions, chacune du côté le
+    plus court, sans recopier le tour.
+
+    Retourne (tour, distance), dans le même format que le tour de départ.
+    """
+    start_time = time.time()
+    D = _as_distances(distance_matrix)
+    voisins = np.asarray(voisins).tolist()
+    tour, restitue = _as_array_tour(tour_initial, len(D))
+    ordre, pos, n = tour.ordre, tour.pos, tour.n
+
+    distance = calculate_total_distance(tour, D)
+    iteration = 0
+    file, actif = _active_queue(tour, len(D))
+
+    def cherche(t1):
+        """Premier mouvement améliorant à partir de t1 : (gain, 2-opt ou cas 3-opt)."""
+        p1 = pos[t1]
+        for sens in (1, -1):
+            t2 = int(ordre[(p1 + sens) % n])
+            d12 = D[t1, t2]
+            for t3 in voisins[t2]:
+                g1 = d12 - D[t2, t3]
+                if g1 <= EPSILON:
+                    break
+                if pos[t3] < 0 or t3 == t1:
+                    continue
+                avant = int(ordre[(pos[t3] - sens) % n])
+                for t4 in (int(ordre[(pos[t3] + sens) % n]), avant):
+                    if t4 == t2:
+                        continue
+                    d34 = D[t3, t4]
+                    # Fermeture 2-opt possible si t4 précède t3
+                    if t4 == avant and t4 != t1:
+                        gain = g1 + d34 - D[t4, t1]
+                        if gain > EPSILON:
+                            return gain, ('2opt', t1, t2, t4, t3)
+                    for t5 in voisins[t4]:
+                        g2 = g1 + d34 - D[t4, t5]
+                        if g2 <= EPSILON:
+                            break
+                        if pos[t5] < 0 or t5 in (t3, t4):
+                            continue
+                        for t6 in (int(ordre[(pos[t5] + sens) % n]), int(ordre[(pos[t5] - sens) % n])):
+                            gain = g2 + D[t5, t6] - D[t6, t1]
+                            if gain <= EPSILON:
+                                continue
+                            cas = _identify_3opt(tour, sens, t1, t2, t3, t4, t5, t6)
+                            if cas is not None:
+                                return gain, cas
+        return None
+
+    while file:
+        if (time.time() - start_time) > temps_max:
+            print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+            break
+
+        t1 = file.popleft()
+        actif[t1] = False
+        move = cherche(t1)
+        if move is None:
+            continue
+
+        gain, cas = move
+        if cas[0] == '2opt':
+            _, a, b, c, d = cas
+            tour.two_opt_move(a, b, c, d)
+            villes = (a, b, c, d)
+        else:
+            nom, labels = cas
+            for a, b, c, d in CAS_3OPT[nom][1]:
+                tour.two_opt_move(labels[a], labels[b], labels[c], labels[d])
+            villes = labels.values()
+        distance -= gain
+        iteration += 1
+        for ville in villes:
+            if not actif[ville]:
+                actif[ville] = True
+                file.append(ville)
+        if trace is not None:
+            trace(iteration, restitue(tour), distance)
+
+    return restitue(tour), calculate_total_distance(tour, D)
+
+
+def _identify_3opt(tour, sens, t1, t2, t3, t4, t5, t6):
+    """
+    Associe l'échange séquentiel t1..t6 (arêtes retirées (t1,t2), (t3,t4),
+    (t5,t6) ; ajoutées (t2,t3), (t4,t5), (t6,t1)) à l'un des cas de CAS_3OPT.
+    Retourne (cas, étiquettes A..F -> villes), ou None si la reconnexion ne
+    forme pas un tour unique.
+    """
+    aretes = [frozenset((t1, t2)), frozenset((t3, t4)), frozenset((t5, t6))]
+    if len(set(aretes)) < 3:
+        return None
+    pos, n = tour.pos, tour.n
+
+    def rel(ville):
+        return ((pos[ville] - pos[t1]) * sens) % n
+
+    def gauche(x, y):
+        # Extrémité de l'arête (x,y) qui précède l'autre dans le sens de parcours
+        return (x, y) if tour.next(x, sens) == y else (y, x)
+
+    (c, d), (e, f) = sorted((gauche(t3, t4), gauche(t5, t6)), key=lambda arete: rel(arete[0]))
+    labels = {'A': t1, 'B': t2, 'C': c, 'D': d, 'E': e, 'F': f}
+    ajoutees = {frozenset((t2, t3)), frozenset((t4, t5)), frozenset((t6, t1))}
+    if len(ajoutees) < 3 or ajoutees & set(aretes):
+        return None
+    for nom, (aretes_ajoutees, _) in CAS_3OPT.items():
+        if {frozenset((labels[x], labels[y])) for x, y in aretes_ajoutees} == ajoutees:
+            return nom, labels
+    return None
+
+
+def variable_neighborhood_descent(tour_initial, distance_matrix, temps_max, voisins,
+                                  operateurs=(two_opt_neighbors, or_opt), trace=None):
+    """
+    Descente à voisinages variables : applique chaque opérateur jusqu'à son
+    optimum local, et revient au premier dès que l'un d'eux améliore le tour.
+    Les opérateurs ont la signature (tour, distance_matrix, temps_max,
+    voisins, trace) de `two_opt_neighbors` et `or_opt`, et modifient sur
+    place l'ArrayTour qu'ils reçoivent.
+    """
+    start_time = time.time()
+    # Un seul ArrayTour, modifié sur place par tous les opérateurs
+    tour, restitue = _as_array_tour(tour_initial, len(distance_matrix))
+    suivi = None
+    if trace is not None:
+        def suivi(iteration, etat, distance):
+            trace(iteration, restitue(etat), distance)
+    distance = calculate_total_distance(tour, distance_matrix)
+    k = 0
+    while k < len(operateurs):
+        temps_restant = temps_max - (time.time() - start_time)
+        if temps_restant <= 0:
+            print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+            break
+        _, nouvelle_distance = operateurs[k](tour, distance_matrix, temps_restant, voisins, suivi)
+        if nouvelle_distance < distance - EPSILON:
+            distance = nouvelle_distance
+            k = 0
+        else:
+            k += 1
+    return restitue(tour), distance
+
+
+def tabu_search_neighbors(tour_initial, distance_matrix, temps_max, voisins, iterations=500,
+                          tabu_tenure=20, trace=None):
+    """
+    Recherche tabou sur le voisinage 2-opt restreint aux listes de voisins.
+
+    À chaque itération, les gains des mouvements (a, b=succ/préd de a,
+    c dans voisins[a], d) sont évalués d'un bloc par NumPy sur l'ArrayTour,
+    et le meilleur mouvement admissible est appliqué, même s'il dégrade le
+    tour. Une arête retirée ne peut pas être réintroduite pendant
+    `tabu_tenure` itérations, sauf si le mouvement donne un nouveau meilleur
+    tour (critère d'aspiration).
+
+    `trace(iteration, tour, distance)` est appelé à chaque nouveau meilleur
+    tour. Retourne (meilleur tour, distance), dans le même format que le tour
+    de départ.
+    """
+    start_time = time.time()
+    D = _as_distances(distance_matrix)
+    tour, restitue = _as_array_tour(tour_initial, len(D))
+    ordre, pos, n = tour.ordre, tour.pos, tour.n
+
+    # Villes du tour et leurs voisins, fixes pendant toute la recherche
+    A = np.sort(ordre)
+    V = np.asarray(voisins)[A]
+    hors_tour = pos[V] < 0
+    D_AV = D[A[:, None], V].astype(float)  # les gains sont en float64, masqués par np.inf
+
+    distance = calculate_total_distance(tour, D)
+    meilleure_distance, meilleur = distance, ordre.copy()
+    tabou = {}  # arête -> dernière itération où elle reste interdite
+
+    for iteration in range(1, iterations + 1):
+        if (time.time() - start_time) > temps_max:
+            print("Temps d'exécution maximum atteint, arrêt de l'optimisation.")
+            break
+
+        # Gains des mouvements dans les deux sens de parcours : tableau (2, m, K)
+        deltas, extremites = [], []
+        for sens in (1, -1):
+            B = ordre[(pos[A] + sens) % n]
+            Dd = ordre[(pos[V] + sens) % n]
+            delta = D_AV + D[B[:, None], Dd] - D[A, B][:, None] - D[V, Dd]
+            delta[hors_tour | (V == B[:, None]) | (Dd == A[:, None])] = np.inf
+            deltas.append(delta)
+            extremites.append((B, Dd))
+        deltas = np.stack(deltas)
+
+        move = None
+        for idx in np.argsort(deltas, axis=None):
+            s, i, k = np.unravel_index(idx, deltas.shape)
+            delta = deltas[s, i, k]
+            if delta == np.inf:
+                break
+            a, c = int(A[i]), int(V[i, k])
+            b, d = int(extremites[s][0][i]), int(extremites[s][1][i, k])
+            interdit = (tabou.get(frozenset((a, c)), 0) >= iteration
+                        or tabou.get(frozenset((b, d)), 0) >= iteration)
+            if not interdit or distance + delta < meilleure_distance - EPSILON:
+                move = a, b, c, d, delta
+                break
+        if move is None:
+            break
+
+        a, b, c, d, delta = move
+        tour.two_opt_move(a, b, c, d)
+        distance += delta
+        tabou[frozenset((a, b))] = tabou[frozenset((c, d))] = iteration + tabu_tenure
+        if distance < meilleure_distance - EPSILON:
+            meilleure_distance, meilleur = distance, ordre.copy()
+            if trace is not None:
+                trace(iteration, restitue(tour), distance)
+
+    # Le tour courant est remplacé par le meilleur tour rencontré
+    ordre[:] = meilleur
+    pos[meilleur] = np.arange(n, dtype=pos.dtype)
+    return restitue(tour), calculate_total_distance(tour, D)
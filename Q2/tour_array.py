@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:21:36 2026
+
+@author: pierreadrienlefevre
+
+Description: Représentation d'un tour par tableaux NumPy int32 : l'ordre de
+visite et la position de chaque ville. Les requêtes (successeur,
+prédécesseur, position, between) sont en O(1) et les inversions touchent le
+plus court des deux côtés du tour, par affectations vectorisées, sans
+allouer de nouvelle liste à chaque mouvement.
+"""
+
+import numpy as np
+
+# En dessous de cette longueur, une boucle Python coûte moins qu'un appel NumPy
+PETIT_SEGMENT = 8
+
+
+class ArrayTour:
+    """
+    Tour cyclique sur un sous-ensemble des villes 0..taille-1.
+
+    `ordre[i]` est la ville en position i et `pos[v]` la position de la ville
+    v (-1 si elle n'est pas dans le tour). Le sens de parcours peut s'inverser
+    après une inversion du complément ; les mouvements ne s'appuient donc
+    que sur les relations successeur/prédécesseur courantes.
+    """
+
+    def __init__(self, villes, taille=None):
+        self.ordre = np.array(villes, dtype=np.int32)
+        self.n = len(self.ordre)
+        if taille is None:
+            taille = int(self.ordre.max()) + 1 if self.n else 0
+        self.pos = np.full(taille, -1, dtype=np.int32)
+        self.pos[self.ordre] = np.arange(self.n, dtype=np.int32)
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(self.ordre.tolist())
+
+    def __contains__(self, ville):
+        return 0 <= ville < len(self.pos) and self.pos[ville] >= 0
+
+    def __array__(self, dtype=None, copy=None):
+        return self.ordre if dtype is None else self.ordre.astype(dtype)
+
+    def tolist(self, depart=None):
+        """Liste des villes dans l'ordre de visite, en commençant par `depart`."""
+        if depart is None:
+            return self.ordre.tolist()
+        i = int(self.pos[depart])
+        return np.concatenate((self.ordre[i:], self.ordre[:i])).tolist()
+
+    def position(self, ville):
+        return int(self.pos[ville])
+
+    def next(self, ville, sens=1):
+        """Ville suivante dans le sens de parcours (précédente si sens=-1)."""
+        return int(self.ordre[(self.pos[ville] + sens) % self.n])
+
+    def prev(self, ville):
+        return int(self.ordre[self.pos[ville] - 1])
+
+    def between(self, a, b, c):
+        """Vrai si b est sur le chemin de a à c dans le sens de parcours (bornes incluses)."""
+        pa, pb, pc = self.pos[a], self.pos[b], self.pos[c]
+        if pa <= pc:
+            return pa <= pb <= pc
+        return pb >= pa or pb <= pc
+
+    def reverse(self, a, b):
+        """Inverse le chemin de a à b dans le sens de parcours."""
+        self.reverse_positions(int(self.pos[a]), int(self.pos[b]))
+
+    def reverse_positions(self, i, j, plus_court=True):
+        """
+        Inverse les positions i..j (cycliques, bornes incluses). Si le chemin
+        couvre plus de la moitié du tour, c'est le complément qui est inversé
+        (sauf si plus_court=False) : le cycle obtenu est le même, parcouru
+        dans l'autre sens.
+        """
+        n = self.n
+        longueur = (j - i) % n + 1
+        if plus_court and 2 * longueur > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            longueur = n - longueur
+        if longueur < 2:
+            return
+        ordre, pos = self.ordre, self.pos
+        if longueur <= PETIT_SEGMENT:
+            for _ in range(longueur // 2):
+                a, b = ordre[i], ordre[j]
+                ordre[i], pos[b] = b, i
+                ordre[j], pos[a] = a, j
+                i = i + 1 if i + 1 < n else 0
+                j = j - 1 if j > 0 else n - 1
+        elif i + longueur <= n:
+            ordre[i:i + longueur] = ordre[i:i + longueur][::-1]
+            pos[ordre[i:i + longueur]] = np.arange(i, i + longueur, dtype=np.int32)
+        else:
+            idx = np.arange(i, i + longueur, dtype=np.int32) % n
+            ordre[idx] = ordre[idx[::-1]]
+            pos[ordre[idx]] = idx
+
+    def two_opt_move(self, a, b, c, d):
+        """
+        Échange 2-opt défini par ses villes : retire (a,b) et (c,d), ajoute
+        (a,c) et (b,d). b doit suivre a et d suivre c dans un même sens de
+        parcours, quel qu'il soit.
+        """
+        if self.next(a) == b:
+            self.reverse(b, c)  # a b ... c d -> a c ... b d
+        else:
+            self.reverse(c, b)  # d c ... b a -> d b ... c a
+
+    def move_segment(self, debut, longueur, u, inverse=False):
+        """
+        Déplace le segment des positions debut..debut+longueur-1 (cycliques)
+        entre u et son successeur, inversé si `inverse`. Seul le plus court
+        des deux arcs séparant le segment de sa destination est décalé.
+        """
+        n = self.n
+        # Villes entre la fin du segment et u (incluses)
+        m = (int(self.pos[u]) - debut - longueur) % n + 1
+        if m <= n - longueur - m:
+            idx = np.arange(debut, debut + longueur + m, dtype=np.int32) % n
+            avant = self.ordre[idx]
+            segment = avant[:longueur]
+            apres = np.concatenate((avant[longueur:], segment[::-1] if inverse else segment))
+        else:
+            m = n - longueur - m
+            idx = np.arange(debut - m, debut + longueur, dtype=np.int32) % n
+            avant = self.ordre[idx]
+            segment = avant[m:]
+            apres = np.concatenate((segment[::-1] if inverse else segment, avant[:m]))
+        self.ordre[idx] = apres
+        self.pos[apres] = idx
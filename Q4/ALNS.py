@@ -7,20 +7,14 @@ Original file is located at
     https://colab.research.google.com/drive/1VKqyl2A2-TFkT9RE1TQG8BUufxFOdEZB
 """
 
-import copy
+import bisect
+import collections
+import time
 from types import SimpleNamespace
 
-import vrplib
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
 import numpy.random as rnd
 
-from alns import ALNS
-from alns.accept import RecordToRecordTravel
-from alns.select import RouletteWheel
-from alns.stop import MaxRuntime
-
 # Commented out IPython magic to ensure Python compatibility.
 # %matplotlib inline
 
@@ -37,21 +31,9 @@ In this notebook, we use ALNS to solve the most famous VRP variant: the *Capacit
 [CVRPLIB](http://vrp.atd-lab.inf.puc-rio.br/index.php/en/) contains a large collection of CVRP benchmark instances. The library is actively maintained and new best known solutions are updated regularly. We use the `vrplib` package to read the `ORTEC-n242-k12` instance, which consists of 241 customers (+ 1 depot) and 12 vehicles, but we assume that an unlimited number of vehicles is available.
 """
 
-
-# 32 Points : 
-data = vrplib.read_instance('A-n32-k5.vrp')
-bks = SimpleNamespace(**vrplib.read_solution('A-n32-k5.sol'))
-
-'''
-# 242 Points : 
-data = vrplib.read_instance('ORTEC-n242-k12.vrp')
-bks = SimpleNamespace(**vrplib.read_solution('ORTEC-n242-k12.sol'))
-'''
-# 1001 Points : 
-data = vrplib.read_instance('X-n1001-k43.vrp')
-bks = SimpleNamespace(**vrplib.read_solution('X-n1001-k43.sol'))
-
-
+# Instance being solved, as returned by vrplib.read_instance; set by
+# alns_cvrp or by the script below.
+data = None
 
 """The `bks` variable contains the best known solution. Let's plot it, together with the coordinates of the customers:"""
 
@@ -59,6 +41,9 @@ def plot_solution(solution, name="CVRP solution"):
     """
     Plot the routes of the passed-in solution.
     """
+    import matplotlib
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(12, 10))
     cmap = matplotlib.cm.rainbow(np.linspace(0, 1, len(solution.routes)))
 
@@ -79,8 +64,6 @@ def plot_solution(solution, name="CVRP solution"):
     ax.set_ylabel("Y-coordinate")
     ax.legend(frameon=False, ncol=3)
 
-plot_solution(bks, name="Best known solution")
-plt.show()
 
 """## Solution state"""
 
@@ -91,20 +74,66 @@ class CvrpState:
     a single route denoting the sequence of customers to be visited. A route
     does not contain the start and end depot. Unassigned is a list of integers,
     each integer representing an unassigned customer.
+
+    The state also caches the cost and the load of every route (costs and
+    loads, aligned with routes) and the total cost. The operators change the
+    routes only through insert, pop, remove, add_route, set_route and
+    remove_empty_routes, which update these caches by the cost difference of
+    the edges involved, so objective() and capacity checks are O(1).
+
+    Copies are copy-on-write: a copy shares the route lists of its parent,
+    and a route is copied only the first time one of these methods modifies
+    it, in the parent or in the copy. Destroying and repairing a copy thus
+    only allocates the few routes it touches.
+
+    route_of and position map each customer to the index of its route (-1
+    when unassigned) and to its index in that route. The same methods keep
+    them valid, so locating a customer is O(1).
     """
 
-    def __init__(self, routes, unassigned=None):
+    def __init__(self, routes, unassigned=None, costs=None, loads=None):
         self.routes = routes
         self.unassigned = unassigned if unassigned is not None else []
+        self.costs = costs if costs is not None else [route_cost(route) for route in routes]
+        self.loads = loads if loads is not None else [route_load(route) for route in routes]
+        self.total_cost = sum(self.costs)
+        self.route_of = np.full(data["dimension"], -1)
+        self.position = np.zeros(data["dimension"], dtype=int)
+        for route_idx, route in enumerate(routes):
+            self.route_of[route] = route_idx
+            self.position[route] = np.arange(len(route))
+        # Indices of the routes this state may modify in place
+        self._owned = set(range(len(routes)))
 
     def copy(self):
-        return CvrpState(copy.deepcopy(self.routes), self.unassigned.copy())
+        other = CvrpState.__new__(CvrpState)
+        other.routes = self.routes.copy()
+        other.unassigned = self.unassigned.copy()
+        other.costs = self.costs.copy()
+        other.loads = self.loads.copy()
+        other.total_cost = self.total_cost
+        other.route_of = self.route_of.copy()
+        other.position = self.position.copy()
+        # The route lists are now shared by both states
+        other._owned = set()
+        self._owned = set()
+        return other
+
+    def _writable(self, route_idx):
+        """
+        Returns route route_idx, copied first if it is shared with another
+        state.
+        """
+        if route_idx not in self._owned:
+            self.routes[route_idx] = self.routes[route_idx].copy()
+            self._owned.add(route_idx)
+        return self.routes[route_idx]
 
     def objective(self):
         """
-        Computes the total route costs.
+        Returns the total route costs.
         """
-        return sum(route_cost(route) for route in self.routes)
+        return self.total_cost
 
     @property
     def cost(self):
@@ -117,11 +146,90 @@ class CvrpState:
         """
         Return the route that contains the passed-in customer.
         """
-        for route in self.routes:
-            if customer in route:
-                return route
+        return self.routes[self.locate(customer)[0]]
+
+    def locate(self, customer):
+        """
+        Return the (route index, position) of the passed-in customer.
+        """
+        route_idx = self.route_of[customer]
+        if route_idx < 0:
+            raise ValueError(f"Solution does not contain customer {customer}.")
+
+        return int(route_idx), int(self.position[customer])
+
+    def insert(self, customer, route_idx, idx):
+        """
+        Inserts customer in route route_idx at position idx.
+        """
+        route = self._writable(route_idx)
+        delta = insert_cost(customer, route, idx)
+        route.insert(idx, customer)
+        self.route_of[customer] = route_idx
+        self.position[route[idx:]] = np.arange(idx, len(route))
+        self.costs[route_idx] += delta
+        self.loads[route_idx] += data["demand"][customer]
+        self.total_cost += delta
+
+    def pop(self, route_idx, idx):
+        """
+        Removes and returns the customer at position idx of route route_idx.
+        """
+        route = self._writable(route_idx)
+        customer = route.pop(idx)
+        self.route_of[customer] = -1
+        self.position[route[idx:]] = np.arange(idx, len(route))
+        delta = insert_cost(customer, route, idx)
+        self.costs[route_idx] -= delta
+        self.loads[route_idx] -= data["demand"][customer]
+        self.total_cost -= delta
+        return customer
+
+    def remove(self, customer):
+        """
+        Removes the passed-in customer from its route.
+        """
+        self.pop(*self.locate(customer))
 
-        raise ValueError(f"Solution does not contain customer {customer}.")
+    def add_route(self, route):
+        """
+        Adds a new route.
+        """
+        self._owned.add(len(self.routes))
+        self.route_of[route] = len(self.routes)
+        self.position[route] = np.arange(len(route))
+        self.routes.append(route)
+        self.costs.append(route_cost(route))
+        self.loads.append(route_load(route))
+        self.total_cost += self.costs[-1]
+
+    def set_route(self, route_idx, route):
+        """
+        Replaces route route_idx by the passed-in route, whose cost and load
+        are recomputed. Customers leaving the route must be placed in another
+        route with set_route too.
+        """
+        cost = route_cost(route)
+        self.total_cost += cost - self.costs[route_idx]
+        self.routes[route_idx] = route
+        self._owned.add(route_idx)
+        self.costs[route_idx] = cost
+        self.loads[route_idx] = route_load(route)
+        self.route_of[route] = route_idx
+        self.position[route] = np.arange(len(route))
+
+    def remove_empty_routes(self):
+        """
+        Removes the routes without customers.
+        """
+        keep = [idx for idx, route in enumerate(self.routes) if len(route) != 0]
+        self.routes = [self.routes[idx] for idx in keep]
+        self.costs = [self.costs[idx] for idx in keep]
+        self.loads = [self.loads[idx] for idx in keep]
+        self._owned = {new for new, idx in enumerate(keep) if idx in self._owned}
+        for new, idx in enumerate(keep):
+            if new != idx:
+                self.route_of[self.routes[new]] = new
 
 def route_cost(route):
     distances = data["edge_weight"]
@@ -130,26 +238,28 @@ def route_cost(route):
     return sum(distances[tour[idx]][tour[idx + 1]]
                for idx in range(len(tour) - 1))
 
+def route_load(route):
+    return data["demand"][route].sum()
+
 """## Destroy operators
 
 Destroy operators break parts of a solution down, leaving an incomplete state. This is the first part of each iteration of the ALNS meta-heuristic; the incomplete solution is subsequently repaired by any one repair operator. We will consider one destroy operator: **random removal**. We will also use a separate parameter, the degree of destruction, to control the extent of the damage done to a solution in each step.
 """
 
 degree_of_destruction = 0.05
-customers_to_remove = int((data["dimension"] - 1) * degree_of_destruction)
 
 def random_removal(state, rnd_state):
     """
     Removes a number of randomly selected customers from the passed-in solution.
     """
     destroyed = state.copy()
+    customers_to_remove = int((data["dimension"] - 1) * degree_of_destruction)
 
     for customer in rnd_state.choice(
         range(1, data["dimension"]), customers_to_remove, replace=False
     ):
         destroyed.unassigned.append(customer)
-        route = destroyed.find_route(customer)
-        route.remove(customer)
+        destroyed.remove(customer)
 
     return remove_empty_routes(destroyed)
 
@@ -158,7 +268,7 @@ def remove_empty_routes(state):
     """
     Remove empty routes after applying the destroy operator.
     """
-    state.routes = [route for route in state.routes if len(route) != 0]
+    state.remove_empty_routes()
     return state
 
 """## Repair operators
@@ -174,40 +284,51 @@ def greedy_repair(state, rnd_state):
 
     while len(state.unassigned) != 0:
         customer = state.unassigned.pop()
-        route, idx = best_insert(customer, state)
+        route_idx, idx = best_insert(customer, state)
 
-        if route is not None:
-            route.insert(idx, customer)
+        if route_idx is not None:
+            state.insert(customer, route_idx, idx)
         else:
-            state.routes.append([customer])
+            state.add_route([customer])
 
     return state
 
 
 def best_insert(customer, state):
     """
-    Finds the best feasible route and insertion idx for the customer.
+    Finds the best feasible route index and insertion idx for the customer.
     Return (None, None) if no feasible route insertions are found.
-    """
-    best_cost, best_route, best_idx = None, None, None
 
-    for route in state.routes:
-        for idx in range(len(route) + 1):
+    Routes that cannot take the customer are skipped once, from their cached
+    load. The others are laid end to end between depot visits (0, r1, 0, r2,
+    ..., 0): consecutive pairs of this sequence are exactly the insertion
+    positions, whose costs are computed in one NumPy expression.
+    """
+    feasible = [route_idx for route_idx in range(len(state.routes))
+                if can_insert(customer, state, route_idx)]
+    if not feasible:
+        return None, None
 
-            if can_insert(customer, route):
-                cost = insert_cost(customer, route, idx)
+    tours, starts = [0], []
+    for route_idx in feasible:
+        starts.append(len(tours) - 1)  # pair (0, first customer) of the route
+        tours.extend(state.routes[route_idx])
+        tours.append(0)
 
-                if best_cost is None or cost < best_cost:
-                    best_cost, best_route, best_idx = cost, route, idx
+    tours = np.array(tours)
+    best = int(insert_costs(customer, tours[:-1], tours[1:]).argmin())
 
-    return best_route, best_idx
+    # Ties go to the first position, as when scanning route by route
+    k = bisect.bisect_right(starts, best) - 1
+    return feasible[k], best - starts[k]
 
 
-def can_insert(customer, route):
+def can_insert(customer, state, route_idx):
     """
-    Checks if inserting customer does not exceed vehicle capacity.
+    Checks if inserting customer does not exceed vehicle capacity, using the
+    cached route load.
     """
-    total = data["demand"][route].sum() + data["demand"][customer]
+    total = state.loads[route_idx] + data["demand"][customer]
     return total <= data["capacity"]
 
 
@@ -222,16 +343,217 @@ def insert_cost(customer, route, idx):
     # Increase in cost of adding customer, minus cost of removing old edge
     return dist[pred][customer] + dist[customer][succ] - dist[pred][succ]
 
+
+def insert_costs(customer, pred, succ):
+    """
+    Computes the insertion costs of customer between each pair of the arrays
+    pred and succ.
+    """
+    dist = data["edge_weight"]
+    return dist[pred, customer] + dist[customer, succ] - dist[pred, succ]
+
+"""## Regret and blinking repair
+Greedy repair inserts the customers one by one in a random order, each at its cheapest position. **Regret repair** instead inserts first the customer that would lose the most by waiting: the one whose cheapest insertion is the furthest below its second (regret-2) or second and third (regret-3) cheapest insertions in other routes. **Blinking repair**, the repair operator of SISR, inserts the customers in a random, demand, far or close order, and skips ("blinks") each insertion position with a small probability.
+
+Both operators need the best insertion of every unassigned customer in every route at each step. These are kept in a customer x route table: an insertion only changes the route it is made in, so only that column of the table is recomputed afterwards.
+"""
+
+BLINK_RATE = 0.01
+
+class InsertionTable:
+    """
+    Best insertion of the passed-in customers in each route of the state:
+    cost[i, r] and idx[i, r] are the cost and position of the cheapest
+    insertion of customers[i] in route r (inf when the route cannot take
+    the customer). With blink_rate, each position is skipped with that
+    probability, as in SISR.
+    """
+
+    def __init__(self, state, customers, rnd_state=None, blink_rate=0.0):
+        self.state = state
+        self.customers = np.array(customers, dtype=int)
+        self.assigned = np.zeros(len(customers), dtype=bool)
+        self.cost = np.empty((len(customers), len(state.routes)))
+        self.idx = np.empty((len(customers), len(state.routes)), dtype=int)
+        self.rnd_state = rnd_state
+        self.blink_rate = blink_rate
+
+        if state.routes:
+            self.update(range(len(state.routes)))
+
+    def add_route(self, customer):
+        """
+        Puts customer in a new route and adds the column of that route.
+        """
+        self.state.add_route([customer])
+        self.cost = np.column_stack([self.cost, np.empty(len(self.customers))])
+        self.idx = np.column_stack([self.idx, np.empty(len(self.customers), dtype=int)])
+        self.update([len(self.state.routes) - 1])
+
+    def update(self, route_indices):
+        """
+        Recomputes the columns of the passed-in routes for the customers not
+        inserted yet.
+        """
+        rows = np.flatnonzero(~self.assigned)
+        customers = self.customers[rows]
+        routes = [self.state.routes[route_idx] for route_idx in route_indices]
+        dist = data["edge_weight"]
+
+        # Insertion pairs of each route, padded to the longest route
+        width = max(len(route) for route in routes) + 1
+        pred = np.zeros((len(routes), width), dtype=int)
+        succ = np.zeros((len(routes), width), dtype=int)
+        padding = np.ones((len(routes), width), dtype=bool)
+        for k, route in enumerate(routes):
+            pred[k, 1:len(route) + 1] = route
+            succ[k, :len(route)] = route
+            padding[k, :len(route) + 1] = False
+
+        # costs[k, p, i]: insertion of customers[i] between pred[k, p] and succ[k, p]
+        costs = (dist[pred[..., None], customers] + dist[customers, succ[..., None]]
+                 - dist[pred, succ][..., None]).astype(float)
+        costs[padding] = np.inf
+        if self.blink_rate:
+            costs[self.rnd_state.random_sample(costs.shape) < self.blink_rate] = np.inf
+
+        best = costs.argmin(axis=1)
+        cost = np.take_along_axis(costs, best[:, None, :], axis=1)[:, 0, :]
+
+        loads = np.array([self.state.loads[route_idx] for route_idx in route_indices])
+        cost[loads[:, None] + data["demand"][customers] > data["capacity"]] = np.inf
+
+        columns = np.array(route_indices)
+        self.idx[rows[:, None], columns] = best.T
+        self.cost[rows[:, None], columns] = cost.T
+
+    def insert(self, row):
+        """
+        Inserts customers[row] at its best position, or in a new route if no
+        route can take it, and updates the modified column.
+        """
+        customer = self.customers[row]
+        self.assigned[row] = True
+
+        if self.cost.shape[1] and np.isfinite(self.cost[row].min()):
+            route_idx = int(self.cost[row].argmin())
+            self.state.insert(customer, route_idx, self.idx[row, route_idx])
+            self.update([route_idx])
+        else:
+            self.add_route(customer)
+
+
+def regret_repair(state, rnd_state, k=2):
+    """
+    Inserts the unassigned customers by decreasing regret-k: the sum of the
+    differences between the cheapest insertion of a customer and its k - 1
+    next cheapest insertions in other routes. Ties go to the customer with
+    the cheapest insertion; customers that no route can take come first,
+    each in a new route.
+    """
+    table = InsertionTable(state, state.unassigned)
+    state.unassigned = []
+
+    while not table.assigned.all():
+        rows = np.flatnonzero(~table.assigned)
+        costs = table.cost[rows]
+
+        infeasible = np.isinf(costs.min(axis=1)) if costs.shape[1] else np.ones(len(rows), bool)
+        if infeasible.any():
+            table.insert(rows[infeasible.argmax()])
+            continue
+
+        kth = min(k, costs.shape[1])
+        cheapest = np.sort(np.partition(costs, kth - 1, axis=1)[:, :kth], axis=1)
+        regret = (cheapest[:, 1:] - cheapest[:, :1]).sum(axis=1)
+        table.insert(rows[np.lexsort((cheapest[:, 0], -regret))[0]])
+
+    return state
+
+
+def regret2_repair(state, rnd_state):
+    """
+    Regret-2 repair.
+    """
+    return regret_repair(state, rnd_state, 2)
+
+
+def regret3_repair(state, rnd_state):
+    """
+    Regret-3 repair.
+    """
+    return regret_repair(state, rnd_state, 3)
+
+
+def blinking_repair(state, rnd_state):
+    """
+    SISR repair: sorts the unassigned customers randomly, by decreasing
+    demand, by decreasing or by increasing distance to the depot (with
+    weights 4, 4, 2 and 1), then inserts each at its best position, skipping
+    each position with probability BLINK_RATE.
+    """
+    customers = np.array(state.unassigned, dtype=int)
+    rnd_state.shuffle(customers)
+
+    order = rnd_state.choice(4, p=[4 / 11, 4 / 11, 2 / 11, 1 / 11])
+    if order == 1:
+        customers = customers[np.argsort(-data["demand"][customers], kind="stable")]
+    elif order == 2:
+        customers = customers[np.argsort(-data["edge_weight"][0][customers], kind="stable")]
+    elif order == 3:
+        customers = customers[np.argsort(data["edge_weight"][0][customers], kind="stable")]
+
+    table = InsertionTable(state, customers, rnd_state, BLINK_RATE)
+    state.unassigned = []
+
+    for row in range(len(customers)):
+        table.insert(row)
+
+    return state
+
 """## Initial solution
 We need an initial solution that is going to be destroyed and repaired by the ALNS heuristic. To this end, we use a simple *nearest neighbor (NN)* heuristic. NN starts with an empty solution and iteratively adds the nearest customer to the routes. If there are no routes available, then a new route is created.
 """
 
+# Number of nearest neighbors kept per customer in the neighbor index
+NEIGHBORS_K = 100
+
+# (instance, index) of the last neighbor index built
+_neighbor_index = (None, None)
+
+def neighbor_index():
+    """
+    Return the neighbor index of the current instance: row c holds the
+    NEIGHBORS_K nearest customers of c (c itself first, the depot excluded),
+    sorted by distance, as int32. It is built once per instance with a
+    partial sort (argpartition) of each row of the distance matrix.
+    """
+    global _neighbor_index
+    instance, index = _neighbor_index
+
+    if instance is not data:
+        dist = np.asarray(data["edge_weight"])[:, 1:]
+        k = min(NEIGHBORS_K, dist.shape[1])
+        index = np.empty((len(dist), k), dtype=np.int32)
+
+        # By blocks of rows, to bound the temporary index arrays
+        for start in range(0, len(dist), 1024):
+            block = dist[start:start + 1024]
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+            order = np.take_along_axis(block, nearest, axis=1).argsort(axis=1, kind="stable")
+            index[start:start + 1024] = np.take_along_axis(nearest, order, axis=1) + 1
+
+        _neighbor_index = (data, index)
+
+    return index
+
+
 def neighbors(customer):
     """
-    Return the nearest neighbors of the customer, excluding the depot.
+    Return the NEIGHBORS_K nearest neighbors of the customer, excluding the
+    depot.
     """
-    locations = np.argsort(data["edge_weight"][customer])
-    return locations[locations != 0]
+    return neighbor_index()[customer]
 
 
 def nearest_neighbor():
@@ -239,8 +561,15 @@ def nearest_neighbor():
     Build a solution by iteratively constructing routes, where the nearest
     customer is added until the route has met the vehicle capacity limit.
     """
+    index = neighbor_index()
     routes = []
-    unvisited = set(range(1, data["dimension"]))
+    visited = np.zeros(data["dimension"], dtype=bool)
+    visited[0] = True
+    unvisited = data["dimension"] - 1
+
+    # pointer[c]: first entry of index[c] that may still be unvisited. Visited
+    # customers stay visited, so the pointers only move forward.
+    pointer = np.zeros(data["dimension"], dtype=int)
 
     while unvisited:
         route = [0]  # Start at the depot
@@ -249,13 +578,23 @@ def nearest_neighbor():
         while unvisited:
             # Add the nearest unvisited customer to the route till max capacity
             current = route[-1]
-            nearest = [nb for nb in neighbors(current) if nb in unvisited][0]
+            ptr = pointer[current]
+            while ptr < index.shape[1] and visited[index[current, ptr]]:
+                ptr += 1
+            pointer[current] = ptr
+
+            if ptr < index.shape[1]:
+                nearest = index[current, ptr]
+            else:
+                # All the indexed neighbors are visited: scan the whole row
+                nearest = np.where(visited, np.inf, data["edge_weight"][current]).argmin()
 
             if route_demands + data["demand"][nearest] > data["capacity"]:
                 break
 
             route.append(nearest)
-            unvisited.remove(nearest)
+            visited[nearest] = True
+            unvisited -= 1
             route_demands += data["demand"][nearest]
 
         customers = route[1:]  # Remove the depot
@@ -263,42 +602,12 @@ def nearest_neighbor():
 
     return CvrpState(routes)
 
-plot_solution(nearest_neighbor(), 'Nearest neighbor solution')
-plt.show()
 
 """## Heuristic solution
 
 Let's now construct our ALNS heuristic. Since we only have one destroy and repair operator, we do not actually use any adaptive operator selection -- but you can easily add more destroy and repair operators.
 """
 
-alns = ALNS(rnd.RandomState(SEED))
-
-alns.add_destroy_operator(random_removal)
-
-alns.add_repair_operator(greedy_repair)
-
-init = nearest_neighbor()
-select = RouletteWheel([25, 5, 1, 0], 0.8, 1, 1)
-accept = RecordToRecordTravel.autofit(init.objective(), 0.02, 0, 9000)
-stop = MaxRuntime(600)
-
-result = alns.iterate(init, select, accept, stop)
-
-solution = result.best_state
-objective = solution.objective()
-pct_diff = 100 * (objective - bks.cost) / bks.cost
-
-print(f"Best heuristic objective is {objective}.")
-print(f"This is {pct_diff:.1f}% worse than the optimal solution, which is {bks.cost}.")
-
-_, ax = plt.subplots(figsize=(12, 6))
-result.plot_objectives(ax=ax)
-plt.show()
-
-"""Let's have a look at the solution:"""
-
-plot_solution(solution, 'Simple ALNS')
-plt.show()
 """## Slack-induced substring removal
 The simple destroy and repair operator from above work fine, but there are better destroy and repair operators for CVRP. One example is the *Slack Induction by Substring Removal (SISR)* method proposed by [Christiaens and Vanden Berghe (2020)](https://pubsonline.informs.org/doi/abs/10.1287/trsc.2019.0914?casa_token=lPUXU1Ax8PIAAAAA:yTE9Pu6L9QGPRu_vt-ZMHF0AZvL9gV0fNS4QAUTOJboQcgTVyOR9_RTbm9rZcImyKI4GUW9pLv1j). SISR obtains state-of-the-art results using a destroy operator that, instead of removing random customers, removes partial routes (called *strings*) that are all located near each other. Moreover, a blinking feature is added to the greedy repair operator, where certain insertion checks are skipped. For more details, we refer to the paper.
 
@@ -318,67 +627,345 @@ def string_removal(state, rnd_state):
     max_string_size = max(MAX_STRING_SIZE, avg_route_size)
     max_string_removals = min(len(state.routes), MAX_STRING_REMOVALS)
 
-    destroyed_routes = []
+    destroyed_routes = set()
     center = rnd_state.randint(1, data["dimension"])
 
     for customer in neighbors(center):
         if len(destroyed_routes) >= max_string_removals:
             break
 
-        if customer in destroyed.unassigned:
-            continue
-
-        route = destroyed.find_route(customer)
-        if route in destroyed_routes:
+        route_idx = destroyed.route_of[customer]
+        if route_idx < 0 or route_idx in destroyed_routes:
             continue
 
-        customers = remove_string(route, customer, max_string_size, rnd_state)
+        customers = remove_string(destroyed, route_idx, customer, max_string_size, rnd_state)
         destroyed.unassigned.extend(customers)
-        destroyed_routes.append(route)
+        destroyed_routes.add(route_idx)
 
     return destroyed
 
 
-def remove_string(route, cust, max_string_size, rnd_state):
+def remove_string(state, route_idx, cust, max_string_size, rnd_state):
     """
-    Remove a string that constains the passed-in customer.
+    Remove a string that constains the passed-in customer from route
+    route_idx of the state.
     """
+    route = state.routes[route_idx]
+
     # Find consecutive indices to remove that contain the customer
     size = rnd_state.randint(1, min(len(route), max_string_size) + 1)
-    start = route.index(cust) - rnd_state.randint(size)
+    start = state.position[cust] - rnd_state.randint(size)
     idcs = [idx % len(route) for idx in range(start, start + size)]
 
     # Remove indices in descending order
     removed_customers = []
     for idx in sorted(idcs, reverse=True):
-        removed_customers.append(route.pop(idx))
+        removed_customers.append(state.pop(route_idx, idx))
 
     return removed_customers
 
-alns = ALNS(rnd.RandomState(SEED))
 
-alns.add_destroy_operator(string_removal)
+r"""## Worst, related (Shaw) and route removal
+Three more destroy operators give the adaptive operator selection something to choose from. **Worst removal** removes the customers whose removal saves the most, **Shaw removal** ([Shaw (1998)](https://link.springer.com/chapter/10.1007/3-540-49481-2_30)) removes customers related to each other (close, with similar demands), and **route removal** empties whole routes, which lets the repair operator rebuild them or spread their customers over the other routes. Worst and Shaw removal follow [Ropke and Pisinger (2006)](https://pubsonline.informs.org/doi/abs/10.1287/trsc.1050.0135): the customers are ranked, and the customer at rank $\lfloor y^p L \rfloor$ is picked, with $y$ uniform in $[0, 1)$ and $L$ the number of ranked customers, so that $p$ controls how deterministic the choice is.
+"""
+
+WORST_DETERMINISM = 3
+SHAW_DETERMINISM = 6
+SHAW_DISTANCE_WEIGHT = 9
+SHAW_DEMAND_WEIGHT = 2
+
+def removal_gains(state):
+    """
+    Return (customers, gains): every assigned customer and the cost saved by
+    removing it from its route, d[pred,c] + d[c,succ] - d[pred,succ],
+    computed in one NumPy expression over the routes laid end to end
+    between depot visits.
+    """
+    tours = [0]
+    for route in state.routes:
+        tours.extend(route)
+        tours.append(0)
+
+    tours = np.array(tours)
+    inner = np.flatnonzero(tours[1:-1]) + 1
+    customers = tours[inner]
+
+    return customers, insert_costs(customers, tours[inner - 1], tours[inner + 1])
+
+
+def worst_removal(state, rnd_state):
+    """
+    Removes customers with large removal gains. The gains are computed once,
+    before the removals: removing a few percent of the customers only
+    changes the gains of their route neighbors.
+    """
+    destroyed = state.copy()
+    customers_to_remove = int((data["dimension"] - 1) * degree_of_destruction)
+
+    customers, gains = removal_gains(destroyed)
+    ranked = list(customers[np.argsort(-gains, kind="stable")])
+
+    for _ in range(min(customers_to_remove, len(ranked))):
+        rank = int(rnd_state.random_sample() ** WORST_DETERMINISM * len(ranked))
+        customer = ranked.pop(rank)
+        destroyed.unassigned.append(customer)
+        destroyed.remove(customer)
+
+    return remove_empty_routes(destroyed)
+
+
+def shaw_removal(state, rnd_state):
+    """
+    Removes customers related to each other. Starting from a random
+    customer, one of the removed customers is drawn and its most related
+    assigned neighbors (from the neighbor index) are ranked by
+    SHAW_DISTANCE_WEIGHT * normalised distance + SHAW_DEMAND_WEIGHT *
+    normalised demand difference.
+    """
+    destroyed = state.copy()
+    customers_to_remove = int((data["dimension"] - 1) * degree_of_destruction)
+    dist, demand = data["edge_weight"], data["demand"]
+
+    removed = [rnd_state.randint(1, data["dimension"])]
+    destroyed.remove(removed[0])
+
+    while len(removed) < customers_to_remove:
+        seed = removed[rnd_state.randint(len(removed))]
+        candidates = neighbors(seed)
+        candidates = candidates[destroyed.route_of[candidates] >= 0]
+
+        if len(candidates) == 0:
+            # Every indexed neighbor is removed: restart from a new customer
+            assigned = np.flatnonzero(destroyed.route_of >= 0)
+            if len(assigned) == 0:
+                break
+            candidates = assigned[rnd_state.randint(len(assigned)), None]
+
+        distances = dist[seed, candidates]
+        relatedness = (SHAW_DISTANCE_WEIGHT * distances / max(distances.max(), 1e-9)
+                       + SHAW_DEMAND_WEIGHT * np.abs(demand[candidates] - demand[seed])
+                       / data["capacity"])
+        ranked = candidates[np.argsort(relatedness, kind="stable")]
+
+        customer = ranked[int(rnd_state.random_sample() ** SHAW_DETERMINISM * len(ranked))]
+        destroyed.remove(customer)
+        removed.append(customer)
+
+    destroyed.unassigned.extend(removed)
+    return remove_empty_routes(destroyed)
 
-alns.add_repair_operator(greedy_repair)
 
-init = nearest_neighbor()
-select = RouletteWheel([25, 5, 1, 0], 0.8, 1, 1)
-accept = RecordToRecordTravel.autofit(init.objective(), 0.02, 0, 6000)
-stop = MaxRuntime(600)
+def route_removal(state, rnd_state):
+    """
+    Removes whole random routes, until at least as many customers as the
+    other destroy operators remove are unassigned.
+    """
+    destroyed = state.copy()
+    customers_to_remove = int((data["dimension"] - 1) * degree_of_destruction)
 
-result = alns.iterate(init, select, accept, stop)
+    for route_idx in rnd_state.permutation(len(destroyed.routes)):
+        if len(destroyed.unassigned) >= max(customers_to_remove, 1):
+            break
 
-_, ax = plt.subplots(figsize=(12, 6))
-result.plot_objectives(ax=ax)
+        while destroyed.routes[route_idx]:
+            destroyed.unassigned.append(destroyed.pop(route_idx, len(destroyed.routes[route_idx]) - 1))
 
-solution = result.best_state
-objective = solution.objective()
-pct_diff = 100 * (objective - bks.cost) / bks.cost
+    return remove_empty_routes(destroyed)
+
+
+"""## Local search
+Destroy and repair operators rebuild large parts of a solution, but never polish the routes they produce. A local search stage applies the classical CVRP moves to some of the solutions found: **2-opt** inside a route, and **relocate**, **swap** and **2-opt*** (exchange of route tails) between two routes. As in Q2, only moves that bring a customer next to one of its nearest neighbors are evaluated, and capacity is checked with the cached route loads.
+"""
+
+LOCAL_SEARCH_NEIGHBORS = 20
+
+def local_search(state, rnd_state, max_time=None, customers=None):
+    """
+    Improves the state in place with first-improvement moves between a
+    customer and its LOCAL_SEARCH_NEIGHBORS nearest customers, until no move
+    improves the state or max_time seconds have passed. Returns the state.
+
+    Only the passed-in customers (all the assigned customers by default) are
+    examined at first. As with the don't-look bits of Q2, a customer is
+    examined again only when a move modifies its route.
+    """
+    index = neighbor_index()[:, :LOCAL_SEARCH_NEIGHBORS + 1]
+    deadline = None if max_time is None else time.perf_counter() + max_time
+
+    if customers is None:
+        customers = np.flatnonzero(state.route_of >= 0)
+    queue = collections.deque(rnd_state.permutation(customers))
+    queued = np.zeros(data["dimension"], dtype=bool)
+    queued[customers] = True
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+        u = queue.popleft()
+        queued[u] = False
+        if state.route_of[u] < 0:
+            continue
+
+        for v in index[u]:
+            if v == u or state.route_of[v] < 0:
+                continue
+
+            modified = improve_pair(state, u, v)
+            if modified:
+                for route_idx in modified:
+                    for customer in state.routes[route_idx]:
+                        if not queued[customer]:
+                            queued[customer] = True
+                            queue.append(customer)
+                break
+
+    return remove_empty_routes(state)
+
+
+def improve_pair(state, u, v):
+    """
+    Applies the first improving move that places customer u next to customer
+    v: 2-opt if both are in the same route, else relocate of u next to v,
+    swap of u and v, or 2-opt* joining the head of u's route to the tail of
+    v's route. Returns the indices of the modified routes, empty if no move
+    improves.
+    """
+    dist, demand, capacity = data["edge_weight"], data["demand"], data["capacity"]
+    ru, pu = state.locate(u)
+    rv, pv = state.locate(v)
+    route_u, route_v = state.routes[ru], state.routes[rv]
+    pred_u = route_u[pu - 1] if pu > 0 else 0
+    succ_u = route_u[pu + 1] if pu + 1 < len(route_u) else 0
+    pred_v = route_v[pv - 1] if pv > 0 else 0
+    succ_v = route_v[pv + 1] if pv + 1 < len(route_v) else 0
+    eps = 1e-9
+
+    if ru == rv:
+        # 2-opt: reverse the customers between u and v to create edge (u, v)
+        if pu < pv:
+            delta = dist[u, v] + dist[succ_u, succ_v] - dist[u, succ_u] - dist[v, succ_v]
+            i, j = pu + 1, pv
+        else:
+            delta = dist[v, u] + dist[pred_v, pred_u] - dist[pred_v, v] - dist[pred_u, u]
+            i, j = pv, pu - 1
+        if delta < -eps:
+            state.set_route(ru, route_u[:i] + route_u[i:j + 1][::-1] + route_u[j + 1:])
+            return ru,
+        return ()
+
+    removal_u = dist[pred_u, u] + dist[u, succ_u] - dist[pred_u, succ_u]
+
+    # Relocate u after or before v
+    if state.loads[rv] + demand[u] <= capacity:
+        if dist[v, u] + dist[u, succ_v] - dist[v, succ_v] - removal_u < -eps:
+            state.pop(ru, pu)
+            state.insert(u, rv, pv + 1)
+            return ru, rv
+        if dist[pred_v, u] + dist[u, v] - dist[pred_v, v] - removal_u < -eps:
+            state.pop(ru, pu)
+            state.insert(u, rv, pv)
+            return ru, rv
+
+    # Swap u and v
+    if (state.loads[ru] - demand[u] + demand[v] <= capacity
+            and state.loads[rv] - demand[v] + demand[u] <= capacity):
+        delta = (dist[pred_u, v] + dist[v, succ_u] - dist[pred_u, u] - dist[u, succ_u]
+                 + dist[pred_v, u] + dist[u, succ_v] - dist[pred_v, v] - dist[v, succ_v])
+        if delta < -eps:
+            state.set_route(ru, route_u[:pu] + [v] + route_u[pu + 1:])
+            state.set_route(rv, route_v[:pv] + [u] + route_v[pv + 1:])
+            return ru, rv
+
+    # 2-opt*: u's route continues with v and the rest of v's route
+    delta = dist[u, v] + dist[pred_v, succ_u] - dist[u, succ_u] - dist[pred_v, v]
+    if delta < -eps:
+        head_u, tail_u = route_u[:pu + 1], route_u[pu + 1:]
+        head_v, tail_v = route_v[:pv], route_v[pv:]
+        if (route_load(head_u) + route_load(tail_v) <= capacity
+                and route_load(head_v) + route_load(tail_u) <= capacity):
+            state.set_route(ru, head_u + tail_v)
+            state.set_route(rv, head_v + tail_u)
+            return ru, rv
+
+    return ()
+
+
+def alns_cvrp(instance, destroy_operators=(string_removal,), repair_operators=(greedy_repair,),
+              seed=SEED, max_runtime=600, autofit_iterations=6000, dtype=None,
+              tsplib_rounding=False, local_search_share=0.0, local_search_on=("best",)):
+    """
+    Solves the passed-in vrplib instance with ALNS, starting from the nearest
+    neighbor solution, without any plotting. Returns the alns Result object;
+    its best_state attribute is the best solution found.
+
+    With `tsplib_rounding`, edge weights are rounded to the nearest integer
+    as in TSPLIB (vrplib keeps the exact Euclidean distances), which is how
+    the best known solutions are costed. `dtype` (e.g. np.int32 or
+    np.float32) is the storage type of the edge weights; integer types
+    require integer weights and keep the costs exact. Unsigned types are
+    widened to int32, since insertion costs can be negative.
+
+    With `local_search_share` > 0, the nearest neighbor solution is improved
+    by local_search, and so are the solutions with an outcome in
+    `local_search_on` ("best", "better" or "accept"), on the routes changed
+    by their destroy and repair operators, as long as the local search has
+    used less than this share of the elapsed runtime. 0 disables it.
+    """
+    if tsplib_rounding or dtype is not None:
+        weights = np.asarray(instance["edge_weight"])
+        if tsplib_rounding:
+            weights = np.floor(weights + 0.5)
+        if dtype is not None:
+            dtype = np.dtype(dtype)
+            if dtype.kind in "iu" and not np.array_equal(weights, np.rint(weights)):
+                raise ValueError(f"{dtype.name} edge weights require integer distances "
+                                 "(use tsplib_rounding=True)")
+            weights = weights.astype(np.int32 if dtype.kind == "u" else dtype)
+        instance = dict(instance, edge_weight=weights)
+
+    from alns import ALNS
+    from alns.accept import RecordToRecordTravel
+    from alns.select import RouletteWheel
+    from alns.stop import MaxRuntime
+
+    global data
+    data = instance
+
+    rnd_state = rnd.RandomState(seed)
+    alns = ALNS(rnd_state)
+
+    for operator in destroy_operators:
+        alns.add_destroy_operator(operator)
+
+    for operator in repair_operators:
+        alns.add_repair_operator(operator)
+
+    init = nearest_neighbor()
+
+    if local_search_share > 0:
+        local_search(init, rnd_state, local_search_share * max_runtime)
+        start, spent = time.perf_counter(), [0.0]
+
+        def improve(state, rnd_state, **kwargs):
+            budget = local_search_share * (time.perf_counter() - start) - spent[0]
+            if budget > 0:
+                begin = time.perf_counter()
+                # Routes copied since the state was copied: destroyed or repaired
+                changed = [customer for route_idx in state._owned
+                           for customer in state.routes[route_idx]]
+                local_search(state, rnd_state, budget, changed)
+                spent[0] += time.perf_counter() - begin
+
+        for outcome in local_search_on:
+            getattr(alns, f"on_{outcome}")(improve)
+
+    select = RouletteWheel([25, 5, 1, 0], 0.8, len(destroy_operators), len(repair_operators))
+    accept = RecordToRecordTravel.autofit(init.objective(), 0.02, 0, autofit_iterations)
+    stop = MaxRuntime(max_runtime)
+
+    return alns.iterate(init, select, accept, stop)
 
-print(f"Best heuristic objective is {objective}.")
-print(f"This is {pct_diff:.1f}% worse than the optimal solution, which is {bks.cost}.")
-plot_solution(solution, 'String removals')
-plt.show()
 
 """## Conclusions
 
@@ -387,3 +974,58 @@ In this notebook we implemented two heuristics for the CVRP, using the ALNS meta
 This example shows that by constructing problem-specific operators, one can create even more powerful ALNS heuristics.
 """
 
+
+if __name__ == '__main__':
+    import vrplib
+    import matplotlib.pyplot as plt
+
+    # 32 Points : 
+    data = vrplib.read_instance('A-n32-k5.vrp')
+    bks = SimpleNamespace(**vrplib.read_solution('A-n32-k5.sol'))
+
+    '''
+    # 242 Points : 
+    data = vrplib.read_instance('ORTEC-n242-k12.vrp')
+    bks = SimpleNamespace(**vrplib.read_solution('ORTEC-n242-k12.sol'))
+    '''
+    # 1001 Points : 
+    data = vrplib.read_instance('X-n1001-k43.vrp')
+    bks = SimpleNamespace(**vrplib.read_solution('X-n1001-k43.sol'))
+
+    plot_solution(bks, name="Best known solution")
+    plt.show()
+
+    plot_solution(nearest_neighbor(), 'Nearest neighbor solution')
+    plt.show()
+
+    # Simple ALNS : random removal and greedy repair
+    result = alns_cvrp(data, [random_removal], [greedy_repair], autofit_iterations=9000)
+
+    solution = result.best_state
+    objective = solution.objective()
+    pct_diff = 100 * (objective - bks.cost) / bks.cost
+
+    print(f"Best heuristic objective is {objective}.")
+    print(f"This is {pct_diff:.1f}% worse than the optimal solution, which is {bks.cost}.")
+
+    _, ax = plt.subplots(figsize=(12, 6))
+    result.plot_objectives(ax=ax)
+    plt.show()
+
+    plot_solution(solution, 'Simple ALNS')
+    plt.show()
+
+    # Slack-induced substring removal and greedy repair
+    result = alns_cvrp(data, [string_removal], [greedy_repair], autofit_iterations=6000)
+
+    _, ax = plt.subplots(figsize=(12, 6))
+    result.plot_objectives(ax=ax)
+
+    solution = result.best_state
+    objective = solution.objective()
+    pct_diff = 100 * (objective - bks.cost) / bks.cost
+
+    print(f"Best heuristic objective is {objective}.")
+    print(f"This is {pct_diff:.1f}% worse than the optimal solution, which is {bks.cost}.")
+    plot_solution(solution, 'String removals')
+    plt.show()
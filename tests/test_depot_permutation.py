@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:34:08 2026
+
+@author: pierreadrienlefevre
+
+Description: Dépôt différent du nœud 1 (DEPOT_SECTION) dans read_TSPLIB_CVRP.
+Le dépôt est ramené à l'indice 0 et les autres nœuds gardent leur ordre :
+matrice, demandes et coordonnées doivent être celles du fichier permutées de
+la même façon, que le dépôt soit le premier, un nœud du milieu ou le dernier
+nœud. Couvre EUC_2D (matrice dense et DistanceOracle) et les matrices
+explicites FULL_MATRIX et UPPER_ROW.
+
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tsp_vrp
+
+TAILLE = 13
+CAPACITE = 40
+
+
+def permutation_depot(depot, taille=TAILLE):
+    """Ordre des nœuds (indices 0..taille-1) attendu pour un dépôt 1-indexé."""
+    return [depot - 1] + [i for i in range(taille) if i != depot - 1]
+
+
+def ecrire_instance(chemin, depot, coords, demandes, matrice=None, format_matrice=None):
+    """Écrit une instance CVRP TSPLIB : EUC_2D sans matrice, EXPLICIT sinon."""
+    lignes = ["NAME : %s" % os.path.basename(chemin),
+              "TYPE : CVRP",
+              "DIMENSION : %d" % len(coords),
+              "CAPACITY : %d" % CAPACITE]
+    if matrice is None:
+        lignes += ["EDGE_WEIGHT_TYPE : EUC_2D",
+                   "NODE_COORD_SECTION"]
+        lignes += ["%d %d %d" % (i + 1, x, y) for i, (x, y) in enumerate(coords)]
+    else:
+        lignes += ["EDGE_WEIGHT_TYPE : EXPLICIT",
+                   "EDGE_WEIGHT_FORMAT : %s" % format_matrice,
+                   "EDGE_WEIGHT_SECTION"]
+        for i in range(len(matrice)):
+            debut = 0 if format_matrice == 'FULL_MATRIX' else i + 1
+            if debut < len(matrice):
+                lignes.append(" ".join(str(int(d)) for d in matrice[i, debut:]))
+    lignes.append("DEMAND_SECTION")
+    lignes += ["%d %d" % (i + 1, q) for i, q in enumerate(demandes)]
+    lignes += ["DEPOT_SECTION", str(depot), "-1", "EOF"]
+    with open(chemin, "w") as fichier:
+        fichier.write("\n".join(lignes) + "\n")
+
+
+class TestDepotPermutation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(16)
+        cls.coords = rng.integers(0, 100, size=(TAILLE, 2))
+        cls.demandes = rng.integers(1, 10, size=TAILLE)
+        diff = cls.coords[:, None, :] - cls.coords[None, :, :]
+        cls.euclidienne = np.sqrt((diff ** 2).sum(axis=-1))
+        # Matrice explicite symétrique, entière, sans lien avec les coordonnées
+        matrice = rng.integers(1, 1000, size=(TAILLE, TAILLE))
+        cls.explicite = np.triu(matrice, 1) + np.triu(matrice, 1).T
+        cls.dossier = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dossier)
+
+    def lire(self, depot, matrice=None, format_matrice=None, **options):
+        chemin = os.path.join(self.dossier, "depot%d_%s.vrp" % (depot, format_matrice or "EUC_2D"))
+        demandes = self.demandes.copy()
+        demandes[depot - 1] = 0
+        ecrire_instance(chemin, depot, self.coords, demandes, matrice, format_matrice)
+        return tsp_vrp.read_TSPLIB_CVRP(chemin, **options), demandes
+
+    def verifier(self, problem, demandes, depot, matrice, coordonnees):
+        perm = permutation_depot(depot)
+        self.assertEqual(problem.size, TAILLE - 1)
+        np.testing.assert_allclose(np.asarray(problem.distance_matrix), matrice[np.ix_(perm, perm)])
+        self.assertEqual(list(problem.customer_demands), [demandes[k] for k in perm])
+        self.assertEqual(problem.customer_demands[0], 0)
+        if coordonnees:
+            self.assertEqual(problem.coordinate_points, [self.coords[k].tolist() for k in perm])
+
+    def test_depots(self):
+        for depot in (1, TAILLE // 2 + 1, TAILLE):
+            cas = [('EUC_2D', None, self.euclidienne, True),
+                   ('FULL_MATRIX', self.explicite, self.explicite, False),
+                   ('UPPER_ROW', self.explicite, self.explicite, False)]
+            for format_matrice, ecrite, attendue, coordonnees in cas:
+                with self.subTest(depot=depot, format=format_matrice):
+                    problem, demandes = self.lire(depot, ecrite,
+                                                  None if ecrite is None else format_matrice)
+                    self.verifier(problem, demandes, depot, attendue, coordonnees)
+
+    def test_meme_instance(self):
+        # Même instance lue avec le dépôt en 1 puis ailleurs : la seconde
+        # lecture est la première permutée
+        reference, _ = self.lire(1, self.explicite, 'UPPER_ROW')
+        D = np.asarray(reference.distance_matrix)
+        for depot in (TAILLE // 2 + 1, TAILLE):
+            with self.subTest(depot=depot):
+                problem, _ = self.lire(depot, self.explicite, 'UPPER_ROW')
+                perm = permutation_depot(depot)
+                np.testing.assert_array_equal(np.asarray(problem.distance_matrix), D[np.ix_(perm, perm)])
+
+    def test_oracle(self):
+        # dense=False (DistanceOracle) et matrice dense après permutation
+        for depot in (1, TAILLE // 2 + 1, TAILLE):
+            with self.subTest(depot=depot):
+                dense, _ = self.lire(depot, dense=True)
+                oracle, demandes = self.lire(depot, dense=False)
+                self.assertIsInstance(oracle.distance_matrix, tsp_vrp.DistanceOracle)
+                self.verifier(oracle, demandes, depot, self.euclidienne, True)
+                D = dense.distance_matrix
+                np.testing.assert_array_equal(np.asarray(oracle.distance_matrix), D)
+                for i in (0, depot - 1, TAILLE - 1):
+                    np.testing.assert_array_equal(oracle.distance_matrix[i], D[i])
+                    self.assertEqual(oracle.distance_matrix[i, TAILLE - 1], D[i, TAILLE - 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:40:26 2026
+
+@author: pierreadrienlefevre
+
+Description: Aller-retour par le cache disque : load_TSPLIB_CVRP doit rendre
+le même ProblemDefinition que read_TSPLIB_CVRP, y compris les points et les
+demandes manquants que le lecteur complète par None.
+
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tsp_vrp
+
+ENTETE = """NAME : test
+TYPE : CVRP
+DIMENSION : 5
+CAPACITY : 10
+"""
+
+MATRICE = """EDGE_WEIGHT_TYPE : EXPLICIT
+EDGE_WEIGHT_FORMAT : FULL_MATRIX
+EDGE_WEIGHT_SECTION
+0 5 7 3 9
+5 0 4 6 2
+7 4 0 8 5
+3 6 8 0 7
+9 2 5 7 0
+"""
+
+DEMANDES = """DEMAND_SECTION
+1 0
+2 3
+3 4
+4 2
+5 6
+"""
+
+FIN = """DEPOT_SECTION
+1
+-1
+EOF
+"""
+
+# Coordonnées de tous les nœuds
+EUC_2D = ENTETE + """EDGE_WEIGHT_TYPE : EUC_2D
+NODE_COORD_SECTION
+1 0 0
+2 3 4
+3 6 0
+4 1 7
+5 9 9
+""" + DEMANDES + FIN
+
+# Matrice explicite, coordonnées et demandes de 3 nœuds sur 5 seulement
+PARTIEL = ENTETE + MATRICE + """NODE_COORD_SECTION
+1 0 0
+2 3 4
+3 6 0
+DEMAND_SECTION
+1 0
+2 3
+3 4
+""" + FIN
+
+# Matrice explicite sans coordonnées, affichage de 2 nœuds sur 5
+AFFICHAGE = ENTETE + MATRICE + """DISPLAY_DATA_SECTION
+1 0 0
+2 3 4
+""" + DEMANDES + FIN
+
+
+class TestInstanceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier)
+
+    def ecrire(self, texte):
+        chemin = os.path.join(self.dossier, 'instance.vrp')
+        with open(chemin, "w") as fichier:
+            fichier.write(texte)
+        return chemin
+
+    def verifier(self, chemin, **options):
+        attendu = tsp_vrp.read_TSPLIB_CVRP(chemin, **options)
+        cache = os.path.join(self.dossier, 'cache')
+        # Première lecture (écrit l'entrée) puis lecture de l'entrée existante
+        for _ in range(2):
+            problem = tsp_vrp.load_TSPLIB_CVRP(chemin, cache_dir=cache, **options)
+            for champ in ('size', 'coordinate_points', 'display_coordinate_points',
+                          'customer_demands', 'capacity_constraint', 'edge_weight_type'):
+                self.assertEqual(getattr(problem, champ), getattr(attendu, champ), champ)
+            self.assertEqual(isinstance(problem.distance_matrix, tsp_vrp.DistanceOracle),
+                             isinstance(attendu.distance_matrix, tsp_vrp.DistanceOracle))
+            np.testing.assert_array_equal(np.asarray(problem.distance_matrix),
+                                          np.asarray(attendu.distance_matrix))
+
+    def test_coordonnees(self):
+        self.verifier(self.ecrire(EUC_2D))
+
+    def test_oracle(self):
+        self.verifier(self.ecrire(EUC_2D), dense=False)
+
+    def test_points_et_demandes_manquants(self):
+        chemin = self.ecrire(PARTIEL)
+        problem = tsp_vrp.read_TSPLIB_CVRP(chemin)
+        self.assertEqual(problem.coordinate_points[-1], [None, None])
+        self.assertIsNone(problem.customer_demands[-1])
+        self.verifier(chemin)
+
+    def test_sans_coordonnees(self):
+        chemin = self.ecrire(AFFICHAGE)
+        problem = tsp_vrp.read_TSPLIB_CVRP(chemin)
+        self.assertIsNone(problem.coordinate_points)
+        self.assertEqual(problem.display_coordinate_points[-1], [None, None])
+        self.verifier(chemin)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:12:40 2026
+
+@author: pierreadrienlefevre
+
+Description: Tracé des améliorations de two_opt et three_opt (trace_graph=True),
+en mode 'delta' et 'complet'. creation_graph.graph est remplacé par un
+enregistreur : le test ne dépend ni de matplotlib ni de seaborn.
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tsp_vrp
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.coords = rng.uniform(0, 100, size=(25, 2))
+        diff = self.coords[:, None, :] - self.coords[None, :, :]
+        self.distance_matrix = np.sqrt((diff ** 2).sum(axis=-1))
+        self.tour_initial = list(range(len(self.coords))) + [0]
+
+        # Q1 a aussi un creation_graph, chargé en premier : les solveurs de Q2
+        # doivent tout de même tracer avec celui de Q2
+        tsp_vrp._module('Q1', 'creation_graph.py')
+        creation_graph = tsp_vrp._module('Q2', 'creation_graph.py')
+        self.appels = []
+        graph = creation_graph.graph
+        creation_graph.graph = lambda coords, tour, distance=None, iteration=None, nom_algo=None: \
+            self.appels.append((np.array(coords), list(tour), distance, nom_algo))
+        self.addCleanup(setattr, creation_graph, 'graph', graph)
+
+    def verifier(self, tour, distance, nom_algo):
+        self.assertTrue(self.appels)
+        for coords, tour_trace, distance_trace, nom in self.appels:
+            np.testing.assert_array_equal(coords, self.coords)
+            self.assertEqual(sorted(set(tour_trace)), list(range(len(self.coords))))
+            self.assertEqual(nom, nom_algo)
+        self.assertAlmostEqual(self.appels[-1][2], distance)
+        self.assertEqual(sorted(set(tour)), list(range(len(self.coords))))
+
+    def test_two_opt(self):
+        for mode in ('delta', 'complet'):
+            with self.subTest(mode=mode):
+                self.appels.clear()
+                tour, distance = tsp_vrp.two_opt(list(self.tour_initial), self.distance_matrix, 5,
+                                                 trace_graph=True, mode=mode, coords=self.coords)
+                self.verifier(tour, distance, '2-OPT')
+
+    def test_three_opt(self):
+        for mode in ('delta', 'complet'):
+            with self.subTest(mode=mode):
+                self.appels.clear()
+                tour, distance = tsp_vrp.three_opt(list(self.tour_initial), self.distance_matrix, 5,
+                                                   trace_graph=True, mode=mode, coords=self.coords)
+                self.verifier(tour, distance, '3-OPT')
+
+    def test_sans_coordonnees(self):
+        with self.assertRaises(ValueError):
+            tsp_vrp.two_opt(list(self.tour_initial), self.distance_matrix, 5, trace_graph=True)
+        with self.assertRaises(ValueError):
+            tsp_vrp.three_opt(list(self.tour_initial), self.distance_matrix, 5, trace_graph=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
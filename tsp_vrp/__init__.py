@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:40:12 2026
+
+@author: pierreadrienlefevre
+
+Description: Accès aux algorithmes des dossiers Q1, Q2 et Q4 sous forme de
+fonctions importables, sans exécuter les scripts :
+
+    import tsp_vrp
+    probleme = tsp_vrp.read_TSPLIB_CVRP('Q2/Q2_3.tsp')
+    voisins = tsp_vrp.neighbor_lists(coordinates=probleme.coordinate_points)
+    tour, distance = tsp_vrp.lin_kernighan(list(range(probleme.size)),
+                                           probleme.distance_matrix, 60, voisins)
+
+Les modules ne sont chargés qu'au premier accès à l'une de leurs fonctions,
+et matplotlib, seaborn, pandas et networkx uniquement quand un tracé est
+demandé. `python -m tsp_vrp.importtime` vérifie le budget de temps d'import
+de chaque solveur.
+"""
+
+import builtins
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+_RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LECTEUR = ('Q1', 'TSPFile_reader.py')
+_SAVINGS = ('Q1', 'clark_and_wright_q1.py')
+_CACHE = ('Q1', 'instance_cache.py')
+_LOT = ('Q1', 'batch_loader.py')
+_LOCAL_SEARCH = ('Q2', 'local_search.py')
+_ALNS = ('Q4', 'ALNS.py')
+
+# Dossiers dont les modules sont importables sous tsp_vrp.<dossier>
+_DOSSIERS = ('Q1', 'Q2', 'Q4')
+
+# Nom exposé -> (dossier, fichier) du module qui le définit
+_SOLVEURS = {
+    # Lecture et écriture des instances
+    'read_TSPLIB_CVRP': _LECTEUR,
+    'read_OPT_CVRP': _LECTEUR,
+    'calculate_D': _LECTEUR,
+    'write_TSPLIB_file': _LECTEUR,
+    'DistanceOracle': _LECTEUR,
+    'load_TSPLIB_CVRP': _CACHE,
+    'load_vrplib_instance': _CACHE,
+    'iter_instances': _LOT,
+    'find_instances': _LOT,
+    # Heuristiques de construction
+    'nearest_neighbor': ('Q2', 'nearest_neighbor_Q2.py'),
+    'double_tree': ('Q1', 'Double_tree.py'),
+    'parallel_savings_init': _SAVINGS,
+    'clarke_wright_savings_function': _SAVINGS,
+    'neighbor_savings_function': _SAVINGS,
+    # Recherche locale et métaheuristiques pour le TSP
+    'ArrayTour': ('Q2', 'tour_array.py'),
+    'calculate_total_distance': _LOCAL_SEARCH,
+    'neighbor_lists': _LOCAL_SEARCH,
+    'two_opt_delta': _LOCAL_SEARCH,
+    'two_opt_neighbors': _LOCAL_SEARCH,
+    'or_opt': _LOCAL_SEARCH,
+    'three_opt_neighbors': _LOCAL_SEARCH,
+    'variable_neighborhood_descent': _LOCAL_SEARCH,
+    'tabu_search_neighbors': _LOCAL_SEARCH,
+    'two_opt': ('Q2', '2-OPT.py'),
+    'three_opt': ('Q2', '3-OPT.py'),
+    'lin_kernighan': ('Q2', 'Lin_Kernighan.py'),
+    'tabu_search': ('Q2', 'Tabu_search.py'),
+    # ALNS pour le CVRP
+    'alns_cvrp': _ALNS,
+    'CvrpState': _ALNS,
+    'random_removal': _ALNS,
+    'string_removal': _ALNS,
+    'worst_removal': _ALNS,
+    'shaw_removal': _ALNS,
+    'route_removal': _ALNS,
+    'greedy_repair': _ALNS,
+    'regret2_repair': _ALNS,
+    'regret3_repair': _ALNS,
+    'blinking_repair': _ALNS,
+    'local_search': _ALNS,
+}
+
+__all__ = sorted(_SOLVEURS)
+
+
+def _importeur(dossier):
+    """
+    __import__ des modules de `dossier` : les modules d'un dossier s'importent
+    entre eux par leur nom (local_search, creation_graph...), ces noms sont
+    résolus dans le dossier lui-même. Q1 et Q2 ont chacun leur
+    creation_graph, sys.path ne peut pas servir pour les deux.
+    """
+    def importeur(nom, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and os.path.isfile(os.path.join(_RACINE, dossier, nom + '.py')):
+            return _module(dossier, nom + '.py')
+        return builtins.__import__(nom, globals, locals, fromlist, level)
+    return dict(vars(builtins), __import__=importeur)
+
+
+class _Chargeur(importlib.machinery.SourceFileLoader):
+    """Charge un fichier de Q1, Q2 ou Q4 avec l'__import__ de son dossier."""
+
+    def exec_module(self, module):
+        # Utilisé par les imports du module, y compris ceux faits plus tard
+        # dans ses fonctions
+        module.__builtins__ = _importeur(os.path.basename(os.path.dirname(self.path)))
+        super().exec_module(module)
+
+
+class _Dossiers:
+    """
+    Rend importables tsp_vrp.<dossier> et tsp_vrp.<dossier>.<module>
+    (tsp_vrp.Q2.2-OPT compris), y compris dans les processus d'un pool qui
+    dépicklent une fonction de ces modules.
+    """
+
+    @staticmethod
+    def find_spec(nom, path=None, target=None):
+        parties = nom.split('.')
+        if len(parties) not in (2, 3) or parties[0] != __name__ or parties[1] not in _DOSSIERS:
+            return None
+        if len(parties) == 2:
+            return importlib.machinery.ModuleSpec(nom, None, is_package=True)
+        chemin = os.path.join(_RACINE, parties[1], parties[2] + '.py')
+        if not os.path.isfile(chemin):
+            return None
+        return importlib.util.spec_from_file_location(nom, chemin, loader=_Chargeur(nom, chemin))
+
+
+sys.meta_path.append(_Dossiers)
+
+
+def _module(dossier, fichier):
+    """Importe (une seule fois) le module `fichier` du dossier `dossier`."""
+    return importlib.import_module(f"{__name__}.{dossier}.{fichier[:-3]}")
+
+
+def __getattr__(nom):
+    if nom not in _SOLVEURS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    valeur = getattr(_module(*_SOLVEURS[nom]), nom)
+    globals()[nom] = valeur  # les accès suivants ne repassent pas par ici
+    return valeur
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SOLVEURS))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:02:45 2026
+
+@author: pierreadrienlefevre
+
+Description: Vérifie le budget de temps d'import de chaque solveur du package.
+Chaque accès `tsp_vrp.<nom>` est mesuré dans un interpréteur neuf lancé avec
+`python -X importtime`, pour que les modules déjà chargés par une mesure ne
+faussent pas la suivante. Le script affiche le temps total, les modules les
+plus coûteux, et échoue si un solveur ne s'importe pas, si un budget est
+dépassé ou si une bibliothèque de tracé est chargée.
+
+    python -m tsp_vrp.importtime
+"""
+
+import os
+import subprocess
+import sys
+
+from tsp_vrp import _RACINE, _SOLVEURS
+
+# Budget en millisecondes par nom exposé (interpréteur neuf, numpy compris)
+BUDGET_DEFAUT_MS = 250
+BUDGETS_MS = {
+    # verypy est importé au chargement du module de Clarke & Wright
+    'parallel_savings_init': 900,
+    'clarke_wright_savings_function': 900,
+    'neighbor_savings_function': 900,
+}
+
+# Ne doivent jamais être chargés par un simple accès à un solveur
+INTERDITS = ('matplotlib', 'seaborn', 'pandas', 'networkx')
+
+NB_COUPABLES = 5
+
+_MESURE = """
+import sys, time
+debut = time.perf_counter()
+import tsp_vrp
+tsp_vrp.{nom}
+print('TOTAL', (time.perf_counter() - debut) * 1000)
+print('MODULES', ' '.join(sorted(m for m in sys.modules if '.' not in m)))
+"""
+
+
+def mesure(nom):
+    """
+    Importe tsp_vrp.<nom> dans un interpréteur neuf. Retourne (total_ms,
+    modules chargés, [(cumul_ms, module)] trié) ou lève RuntimeError si
+    l'import échoue (dépendance absente...).
+    """
+    resultat = subprocess.run([sys.executable, '-X', 'importtime', '-c', _MESURE.format(nom=nom)],
+                              cwd=_RACINE, capture_output=True, text=True)
+    if resultat.returncode != 0:
+        raise RuntimeError(resultat.stderr.strip().splitlines()[-1])
+
+    total, modules = 0.0, set()
+    for ligne in resultat.stdout.splitlines():
+        if ligne.startswith('TOTAL'):
+            total = float(ligne.split()[1])
+        elif ligne.startswith('MODULES'):
+            modules = set(ligne.split()[1:])
+
+    # Lignes "import time: self [us] | cumulative | imported package" ;
+    # seuls les modules de premier niveau (non indentés) sont gardés
+    coupables = []
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith('import time:'):
+            continue
+        _, cumul, module = ligne[len('import time:'):].split('|')
+        if cumul.strip().isdigit() and not module.startswith('  '):
+            coupables.append((int(cumul) / 1000, module.strip()))
+    coupables.sort(reverse=True)
+    return total, modules, coupables
+
+
+def main():
+    echecs = 0
+    for nom in sorted(_SOLVEURS, key=lambda n: (_SOLVEURS[n], n)):
+        budget = BUDGETS_MS.get(nom, BUDGET_DEFAUT_MS)
+        try:
+            total, modules, coupables = mesure(nom)
+        except RuntimeError as erreur:
+            # Un solveur qui ne s'importe pas (dépendance absente...) fait
+            # échouer la vérification
+            print(f"{nom:32s} ECHEC import : {erreur}")
+            echecs += 1
+            continue
+
+        charges = [m for m in INTERDITS if m in modules]
+        ok = total <= budget and not charges
+        echecs += not ok
+        dossier, fichier = _SOLVEURS[nom]
+        print(f"{nom:32s} {total:7.1f} ms / {budget:4d} ms  "
+              f"{'ok' if ok else 'DEPASSE'}  ({dossier}/{fichier})")
+        if charges:
+            print(f"    charge : {', '.join(charges)}")
+        if not ok:
+            for cumul, module in coupables[:NB_COUPABLES]:
+                print(f"    {cumul:7.1f} ms  {module}")
+    return 1 if echecs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())